@@ -1,253 +1,737 @@
-import math
-import matplotlib.pyplot as plt
-
-__all__ = ["plot_clusters_with_flow", "merge_all_within_threshold"]
-
-def euclidean_distance(p1, p2):
-    """Compute Euclidean distance between points p1=(x1,y1) and p2=(x2,y2)"""
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-
-def update_center(cluster):
-    """Recalculate the center of a cluster based on all its points"""
-    xs = [pt[0] for pt in cluster["points"]]
-    ys = [pt[1] for pt in cluster["points"]]
-    if len(xs) > 0:
-        cluster["center"] = (sum(xs)/len(xs), sum(ys)/len(ys))
-    else:
-        cluster["center"] = (0, 0)
-
-def merge_clusters(main_cluster_id, other_cluster_id, clusters):
-    """
-    Merge 'other_cluster_id' into 'main_cluster_id'.
-      1) Move points from 'other_cluster_id' → 'main_cluster_id'.
-      2) Update the center of 'main_cluster_id'.
-      3) In every cluster's flow_to list, replace 'other_cluster_id' with 'main_cluster_id'.
-      4) Combine the flow_to lists of main & other (union) and store that in main_cluster.
-      5) Remove 'other_cluster_id' from 'clusters'.
-    """
-    main_cluster = clusters[main_cluster_id]
-    other_cluster = clusters[other_cluster_id]
-
-    # 1) Move points
-    main_cluster["points"].extend(other_cluster["points"])
-
-    # 2) Update center
-    update_center(main_cluster)
-
-    # 3) Redirect any references to 'other_cluster_id' in flow_to lists
-    for cid, clus in clusters.items():
-        if cid == other_cluster_id:
-            continue  # We'll remove it soon anyway
-        new_flow_to = []
-        for target in clus["flow_to"]:
-            if target == other_cluster_id:
-                new_flow_to.append(main_cluster_id)
-            else:
-                new_flow_to.append(target)
-
-        # Remove duplicates if you like, e.g. convert to set, then back to list
-        clus["flow_to"] = list(set(new_flow_to))
-
-    # 4) Combine flow_to lists (union of sets to avoid duplicates)
-    combined_flow = set(main_cluster["flow_to"]) | set(other_cluster["flow_to"])
-    # Remove self if it exists
-    if main_cluster_id in combined_flow:
-        combined_flow.remove(main_cluster_id)
-    main_cluster["flow_to"] = list(combined_flow)
-
-    # 5) Finally remove the other cluster
-    del clusters[other_cluster_id]
-
-def plot_clusters_with_flow(clusters, ax=None, image= None, pixelsPerMeter = None):
-    """
-    Plots each cluster's center and draws arrows based on its flow_to list.
-    'flow_to' is a list of IDs of clusters to which the current cluster flows.
-    """
-    if ax == None:
-        fig, ax = plt.subplots()
-        
-        # Plot each cluster center
-        for cid, cluster_data in clusters.items():
-            cx, cy = cluster_data["center"]
-            ax.scatter(cx, cy, label=f"Cluster {cid}")
-            ax.text(cx + 0.1, cy + 0.1, f"ID={cid}", fontsize=9)
-
-        # Draw arrows
-        for cid, cluster_data in clusters.items():
-            source_center = cluster_data["center"]
-            for flow_target in cluster_data["flow_to"]:
-                if flow_target in clusters:
-                    target_center = clusters[flow_target]["center"]
-                    ax.annotate(
-                        "",
-                        xy=target_center,    # arrow head
-                        xytext=source_center, 
-                        arrowprops=dict(
-                            arrowstyle="->", 
-                            lw=1.5,
-                            connectionstyle="arc3,rad=0.2"
-                        )
-                    )
-
-        ax.set_xlabel("X")
-        ax.set_ylabel("Y")
-        ax.set_title("Clusters (Multiple flow targets)")
-        ax.legend()
-        plt.show()
-    else:
-        ax.clear()  # Clear old plot
-        if image.any():
-            height, width = image.shape[:2]
-            ax.imshow(image, extent=[0, width/pixelsPerMeter, 0, height/pixelsPerMeter])
-        for cid, cluster_data in clusters.items():
-            cx, cy = cluster_data["center"]
-            ax.scatter(cx, cy, label=f"Cluster {cid}")
-            ax.text(cx + 0.1, cy + 0.1, f"ID={cid}", fontsize=9)
-
-        # Draw arrows
-        for cid, cluster_data in clusters.items():
-            source_center = cluster_data["center"]
-            for flow_target in cluster_data["flow_to"]:
-                if flow_target in clusters:
-                    target_center = clusters[flow_target]["center"]
-                    ax.annotate(
-                        "",
-                        xy=target_center,    # arrow head
-                        xytext=source_center, 
-                        arrowprops=dict(
-                            arrowstyle="->", 
-                            lw=1.5,
-                            connectionstyle="arc3,rad=0.2"
-                        )
-                    )
-                    
-        ax.set_title("Clusters (threshold-based merges)")
-        ax.set_xlabel("X")
-        ax.set_ylabel("Y")
-        #ax.legend()
-        ax.figure.canvas.draw()
-def merge_all_within_threshold(clusters, threshold):
-    """
-    Continuously merges any two clusters whose centers are within 'threshold',
-    until no more merges can be done in a single pass.
-    """
-    
-    clearPass = True
-    merged_something = True
-    while merged_something:
-        merged_something = False
-        current_ids = sorted(clusters.keys())
-
-        for i_index in range(len(current_ids)):
-            cid_i = current_ids[i_index]
-            if cid_i not in clusters:
-                continue
-            for j_index in range(i_index+1, len(current_ids)):
-                cid_j = current_ids[j_index]
-                if cid_j not in clusters:
-                    continue
-
-                dist = euclidean_distance(clusters[cid_i]["center"], 
-                                          clusters[cid_j]["center"])
-                if dist < threshold:
-                    clearPass = False
-                    print(f"Merging cluster {cid_j} into cluster {cid_i} (distance={dist:.2f})")
-                    merge_clusters(cid_i, cid_j, clusters)
-                    merged_something = True
-                    break
-            if merged_something:
-                break
-    return clusters, clearPass
-def classesToClusterDictionary(classes):
-    clusters = {  }
-    for i, cluster in enumerate(classes):
-        temp_dict = { "id": i+1,
-            "center": cluster['center'],
-            "points": cluster['points'],
-            "flow_to": [i+2]}
-        if (i+1) == len(classes) :
-            temp_dict["flow_to"] = []
-        clusters[i+1] = temp_dict
-    return clusters
-if __name__ == "__main__":
-    # Example dictionary of clusters with 'flow_to' as lists
-    clusters = {
-        1: {
-            "id": 1,
-            "center": (1.0, 1.0),
-            "points": [(1, 1)],
-            # Suppose cluster 1 flows to clusters 2 and 3
-            "flow_to": [2]
-        },
-        2: {
-            "id": 2,
-            "center": (2.0, 2.0),
-            "points": [(2, 2), (2, 3)],
-            # Suppose cluster 2 flows to cluster 4
-            "flow_to": [3]
-        },
-        3: {
-            "id": 3,
-            "center": (5.0, 6.0),
-            "points": [(5, 6)],
-            "flow_to": [4]
-        },
-        4: {
-            "id": 4,
-            "center": (2.0, 2.0),
-            "points": [(2, 2), (2, 2)],
-            "flow_to": [5]
-        },
-        5: {
-            "id": 5,
-            "center": (9.0, 9.0),
-            "points": [(9, 9)],
-            "flow_to": [6]
-        },
-        6: {
-            "id": 6,
-            "center": (2.0, 2.0),
-            "points": [(1.5, 1.5)],
-            "flow_to": [7]
-        },
-        7: {
-            "id": 7,
-            "center": (5.0, 6.0),
-            "points": [(5.5, 6.5)],
-            "flow_to": [8]
-        },
-        8: {
-            "id": 8,
-            "center": (10, 10),
-            "points": [(10, 10)],
-            "flow_to": []
-        }
-    }
-
-    threshold = 2.0
-    clusters2 = clusters.copy()
-    clearPass = False
-    passNo = 1
-    while clearPass == False:
-        clusters2, clearPass = merge_all_within_threshold(clusters2, threshold)
-        print("============= PASS No", passNo ,"=============")
-        
-        for cid, clus in clusters2.items():
-            print(f"Cluster {cid}:")
-            print(f"  Center: {clus['center']}")
-            print(f"  Points: {clus['points']}")
-            print(f"  Flows to: {clus['flow_to']}")
-        print("=============                =============")
-        passNo += 1
-
-
-    print("\n---- Clusters after merges ----")
-    for cid, clus in clusters2.items():
-        print(f"Cluster {cid}:")
-        print(f"  Center: {clus['center']}")
-        print(f"  Points: {clus['points']}")
-        print(f"  Flows to: {clus['flow_to']}")
-
-    # Finally, visualize
-    plot_clusters_with_flow(clusters)
-    plot_clusters_with_flow(clusters2)
+import math
+import bisect
+import copy
+from collections import defaultdict
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+
+from .ClusterSet import ClusterSet
+
+__all__ = ["plot_clusters_with_flow", "merge_all_within_threshold", "classesToClusterDictionary", "segmentsToClusterDictionary",
+           "MergeDendrogram", "FlowPlot"]
+
+def euclidean_distance(p1, p2):
+    """Compute Euclidean distance between points p1=(x1,y1) and p2=(x2,y2)"""
+    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+
+def cluster_sums(cluster):
+    """
+    Running coordinate sums ((sum_x, sum_y), count) of a cluster, kept in its
+    "sum" and "count" keys. They are computed from the points only the first
+    time, for clusters that don't carry them yet.
+    """
+    if "sum" not in cluster:
+        xs = [pt[0] for pt in cluster["points"]]
+        ys = [pt[1] for pt in cluster["points"]]
+        cluster["sum"] = (sum(xs), sum(ys))
+        cluster["count"] = len(xs)
+    return cluster["sum"], cluster["count"]
+
+def update_center(cluster):
+    """Recalculate the center of a cluster from its coordinate sums and point count"""
+    (sum_x, sum_y), count = cluster_sums(cluster)
+    if count > 0:
+        cluster["center"] = (sum_x/count, sum_y/count)
+    else:
+        cluster["center"] = (0, 0)
+
+def add_cluster_sums(main_cluster, other_cluster):
+    """Adds the sums and count of 'other_cluster' to 'main_cluster' and updates its center in O(1)."""
+    (main_x, main_y), main_count = cluster_sums(main_cluster)
+    (other_x, other_y), other_count = cluster_sums(other_cluster)
+    main_cluster["sum"] = (main_x + other_x, main_y + other_y)
+    main_cluster["count"] = main_count + other_count
+    update_center(main_cluster)
+
+def merge_clusters(main_cluster_id, other_cluster_id, clusters):
+    """
+    Merge 'other_cluster_id' into 'main_cluster_id'.
+      1) Update the center of 'main_cluster_id' from the summed coordinates.
+      2) Move points from 'other_cluster_id' → 'main_cluster_id'.
+      3) In every cluster's flow_to list, replace 'other_cluster_id' with 'main_cluster_id'.
+      4) Combine the flow_to lists of main & other (union) and store that in main_cluster.
+      5) Remove 'other_cluster_id' from 'clusters'.
+    """
+    main_cluster = clusters[main_cluster_id]
+    other_cluster = clusters[other_cluster_id]
+
+    # 1) Update center from the combined sums (before the points move, so
+    #    sums missing on 'main_cluster' are taken from its own points only)
+    add_cluster_sums(main_cluster, other_cluster)
+
+    # 2) Move points (clusters may carry only sums and counts)
+    if "points" in main_cluster and "points" in other_cluster:
+        main_cluster["points"].extend(other_cluster["points"])
+
+    # 3) Redirect any references to 'other_cluster_id' in flow_to lists
+    for cid, clus in clusters.items():
+        if cid == other_cluster_id:
+            continue  # We'll remove it soon anyway
+        new_flow_to = []
+        for target in clus["flow_to"]:
+            if target == other_cluster_id:
+                new_flow_to.append(main_cluster_id)
+            else:
+                new_flow_to.append(target)
+
+        # Remove duplicates if you like, e.g. convert to set, then back to list
+        clus["flow_to"] = list(set(new_flow_to))
+
+    # 4) Combine flow_to lists (union of sets to avoid duplicates)
+    combined_flow = set(main_cluster["flow_to"]) | set(other_cluster["flow_to"])
+    # Remove self if it exists
+    if main_cluster_id in combined_flow:
+        combined_flow.remove(main_cluster_id)
+    main_cluster["flow_to"] = list(combined_flow)
+
+    # 5) Finally remove the other cluster
+    del clusters[other_cluster_id]
+
+class ClusterUnionFind:
+    """
+    Union-find over cluster IDs, used to keep track of merges without
+    touching the flow lists. Unions are by size with path compression, and
+    every set is represented by the ID of the cluster that absorbed the
+    others, so find() answers "which cluster is this ID part of now".
+    IDs that were never added are their own representative.
+    """
+    def __init__(self, ids=()):
+        self.parent = {cid: cid for cid in ids}
+        self.size = {cid: 1 for cid in self.parent}
+        self.representative = {cid: cid for cid in self.parent}
+
+    def _root(self, cid):
+        root = cid
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[cid] != root:
+            self.parent[cid], cid = root, self.parent[cid]
+        return root
+
+    def find(self, cid):
+        if cid not in self.parent:
+            return cid
+        return self.representative[self._root(cid)]
+
+    def union(self, main_id, other_id):
+        """Puts 'other_id' in the set of 'main_id', which keeps representing it."""
+        main_root = self._root(main_id)
+        other_root = self._root(other_id)
+        if main_root == other_root:
+            return
+        if self.size[main_root] < self.size[other_root]:
+            main_root, other_root = other_root, main_root
+        self.parent[other_root] = main_root
+        self.size[main_root] += self.size[other_root]
+        self.representative[main_root] = main_id
+
+def flow_edges(clusters):
+    """Edge table [(source ID, target ID), ...] of the flow_to lists of 'clusters'."""
+    return [(cid, target) for cid, cluster in clusters.items() for target in cluster["flow_to"]]
+
+def materialize_flow(clusters, edges, union_find):
+    """
+    Rebuilds every cluster's flow_to list from the edge table, resolving both
+    ends through union_find. Self loops created by merges are left out.
+    """
+    flows = {cid: set() for cid in clusters}
+    for source, target in edges:
+        source = union_find.find(source)
+        target = union_find.find(target)
+        if source != target and source in flows:
+            flows[source].add(target)
+    for cid, cluster in clusters.items():
+        cluster["flow_to"] = list(flows[cid])
+
+def materialize_points(clusters, merged_into, removed):
+    """
+    Builds the "points" lists of merged clusters in one go. 'merged_into'
+    maps a cluster ID to the IDs merged into it (in merge order) and
+    'removed' holds the clusters that were merged away. The order is the
+    same as extending the lists at every merge.
+    """
+    for cid, cluster in clusters.items():
+        if cid not in merged_into or "points" not in cluster:
+            continue
+        points = []
+        stack = [cid]
+        while stack:
+            member = stack.pop()
+            points.extend(clusters[member]["points"] if member == cid else removed[member].get("points", []))
+            stack.extend(reversed(merged_into.get(member, [])))
+        cluster["points"] = points
+
+def flow_arrays(clusters, transitions=None):
+    """
+    Flow edges between the clusters as arrays (source centers (E, 2), target
+    centers (E, 2), counts (E,)). The edges come from 'transitions' (a
+    TransitionMatrix) when given, otherwise from the flow_to lists, counted
+    with "flow_counts" where the clusters carry it (1 otherwise). Edges to
+    clusters that are not in 'clusters' are left out.
+    """
+    if transitions is not None:
+        sources, targets, counts = (column.tolist() for column in transitions.edges())
+    else:
+        sources, targets, counts = [], [], []
+        for cid, cluster_data in clusters.items():
+            flow_counts = cluster_data.get("flow_counts", {})
+            for flow_target in cluster_data["flow_to"]:
+                sources.append(cid)
+                targets.append(flow_target)
+                counts.append(flow_counts.get(flow_target, 1))
+    keep = [k for k in range(len(sources)) if sources[k] in clusters and targets[k] in clusters]
+    source_centers = np.array([clusters[sources[k]]["center"] for k in keep], dtype=np.float64).reshape(-1, 2)
+    target_centers = np.array([clusters[targets[k]]["center"] for k in keep], dtype=np.float64).reshape(-1, 2)
+    return source_centers, target_centers, np.array([counts[k] for k in keep], dtype=np.float64)
+
+def _flow_curves(source_centers, target_centers, rad=0.2, steps=16):
+    """
+    Polylines (E, steps + 1, 2) of the arcs from source to target, the same
+    quadratic curve as the "arc3,rad=0.2" connection style of annotate().
+    """
+    delta = target_centers - source_centers
+    control = (source_centers + target_centers)/2 + rad*np.column_stack((delta[:, 1], -delta[:, 0]))
+    t = np.linspace(0, 1, steps + 1)[None, :, None]
+    return ((1 - t)**2*source_centers[:, None, :] + 2*(1 - t)*t*control[:, None, :]
+            + t**2*target_centers[:, None, :])
+
+def _flow_geometry(clusters, transitions=None, width_by_count=False, arrow_size=None):
+    """
+    Everything the flow plot draws, as arrays: cluster IDs, centers (K, 2),
+    center colors, arc polylines (E, n, 2), line widths (E,) and arrow head
+    triangles (E, 3, 2).
+    """
+    ids = list(clusters.keys())
+    centers = np.array([clusters[cid]["center"] for cid in ids], dtype=np.float64).reshape(-1, 2)
+    # Same colors as one scatter per cluster would get from the color cycle
+    cycle = plt.rcParams["axes.prop_cycle"].by_key().get("color", ["C0"])
+    colors = [cycle[k % len(cycle)] for k in range(len(ids))]
+
+    source_centers, target_centers, counts = flow_arrays(clusters, transitions)
+    if len(counts) == 0:
+        return ids, centers, colors, np.empty((0, 2, 2)), np.empty(0), np.empty((0, 3, 2))
+    if width_by_count:
+        widths = 0.5 + 3.5*counts/counts.max()
+    else:
+        widths = np.full(len(counts), 1.5)
+    curves = _flow_curves(source_centers, target_centers)
+
+    # Arrow heads: triangles at the targets, along the end of each arc
+    if arrow_size is None:
+        span = np.ptp(centers, axis=0).max() if len(centers) > 1 else 1.0
+        arrow_size = 0.02*span if span > 0 else 0.1
+    direction = curves[:, -1] - curves[:, -2]
+    direction /= np.maximum(np.hypot(direction[:, 0], direction[:, 1]), 1e-12)[:, None]
+    normal = np.column_stack((-direction[:, 1], direction[:, 0]))
+    tip = curves[:, -1]
+    base = tip - direction*arrow_size
+    heads = np.stack((tip, base + normal*arrow_size/2, base - normal*arrow_size/2), axis=1)
+    return ids, centers, colors, curves, widths, heads
+
+def _draw_clusters_with_flow(ax, clusters, transitions=None, width_by_count=False, show_ids=True, arrow_size=None):
+    """Draws the centers with one scatter and all the flow arrows with two collections."""
+    ids, centers, colors, curves, widths, heads = _flow_geometry(clusters, transitions, width_by_count, arrow_size)
+    ax.scatter(centers[:, 0], centers[:, 1], c=colors, label="Cluster centers", zorder=3)
+    if show_ids:
+        for cid, (cx, cy) in zip(ids, centers.tolist()):
+            ax.text(cx + 0.1, cy + 0.1, f"ID={cid}", fontsize=9)
+    if len(widths) == 0:
+        return
+    ax.add_collection(LineCollection(curves, linewidths=widths, colors="black", label="Flow"))
+    ax.add_collection(PolyCollection(heads, facecolors="black", edgecolors="black"))
+    ax.autoscale_view()
+
+class FlowPlot:
+    """
+    Cluster and flow plot on an embedded axes that lives across updates.
+
+    The floor plan image, titles and axes are drawn only on full redraws
+    and cached as a blitting background; the centers, arrows and ID labels
+    are animated artists that update() changes in place and blits over that
+    background. A full redraw (resize, toolbar zoom, or clusters moving out
+    of the view when there is no image) recaptures the background through
+    the canvas' draw_event.
+    """
+    def __init__(self, ax, image=None, pixelsPerMeter=None):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.background = None
+        self.fitted = False
+        self.has_image = image is not None and pixelsPerMeter is not None
+        ax.clear()
+        if self.has_image:
+            height, width = image.shape[:2]
+            ax.imshow(image, extent=[0, width/pixelsPerMeter, 0, height/pixelsPerMeter])
+        ax.set_title("Clusters (threshold-based merges)")
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+
+        self.centers = ax.scatter(np.empty(0), np.empty(0), zorder=3, animated=True)
+        self.lines = LineCollection([], colors="black", animated=True)
+        self.heads = PolyCollection([], facecolors="black", edgecolors="black", animated=True)
+        ax.add_collection(self.lines, autolim=False)
+        ax.add_collection(self.heads, autolim=False)
+        self.labels = []
+        self.draw_cid = self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def artists(self):
+        return [self.lines, self.heads, self.centers] + [label for label in self.labels if label.get_visible()]
+
+    def on_draw(self, event):
+        """After a full redraw: keep the static layers, then put the animated artists on top."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+
+    def _fit_view(self, centers):
+        """Widens the view to the centers; True if the limits changed."""
+        if self.has_image or len(centers) == 0:
+            return False
+        low = centers.min(axis=0)
+        high = centers.max(axis=0)
+        margin = np.maximum((high - low)*0.05, 0.5)
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        if not self.fitted:
+            # The first clusters set the view, later ones only widen it
+            x0, y0 = low + margin
+            x1, y1 = high - margin
+            self.fitted = True
+        elif low[0] >= x0 and high[0] <= x1 and low[1] >= y0 and high[1] <= y1:
+            return False
+        self.ax.set_xlim(min(x0, low[0] - margin[0]), max(x1, high[0] + margin[0]))
+        self.ax.set_ylim(min(y0, low[1] - margin[1]), max(y1, high[1] + margin[1]))
+        return True
+
+    def update(self, clusters, transitions=None, width_by_count=False, show_ids=True, arrow_size=None):
+        """Shows 'clusters' (same arguments as plot_clusters_with_flow)."""
+        ids, centers, colors, curves, widths, heads = _flow_geometry(clusters, transitions, width_by_count, arrow_size)
+        self.centers.set_offsets(centers)
+        self.centers.set_facecolors(colors)
+        self.centers.set_edgecolors(colors)
+        self.lines.set_segments(curves)
+        self.lines.set_linewidths(widths)
+        self.heads.set_verts(heads)
+
+        # Reuse the label texts, only adding the ones that are missing
+        count = len(ids) if show_ids else 0
+        while len(self.labels) < count:
+            self.labels.append(self.ax.text(0, 0, "", fontsize=9, animated=True))
+        for k, label in enumerate(self.labels):
+            label.set_visible(k < count)
+            if k < count:
+                label.set_position((centers[k, 0] + 0.1, centers[k, 1] + 0.1))
+                label.set_text(f"ID={ids[k]}")
+
+        if self._fit_view(centers) or self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.draw_cid)
+
+def plot_clusters_with_flow(clusters, ax=None, image= None, pixelsPerMeter = None, transitions=None,
+                            width_by_count=False, show_ids=True, arrow_size=None):
+    """
+    Plots each cluster's center and draws arrows based on its flow_to list.
+    'flow_to' is a list of IDs of clusters to which the current cluster flows.
+
+    All centers are one scatter and all arrows one LineCollection plus one
+    PolyCollection for the heads, so the redraw cost barely depends on the
+    number of edges. With a TransitionMatrix as 'transitions' the edges
+    are taken from it, and 'width_by_count' scales the arrows with the
+    number of transitions. The ID labels are one text each, leave them out
+    with show_ids=False for very large graphs.
+    """
+    if ax == None:
+        fig, ax = plt.subplots()
+        _draw_clusters_with_flow(ax, clusters, transitions, width_by_count, show_ids, arrow_size)
+
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        ax.set_title("Clusters (Multiple flow targets)")
+        ax.legend()
+        plt.show()
+    else:
+        ax.clear()  # Clear old plot
+        if image is not None and image.any():
+            height, width = image.shape[:2]
+            ax.imshow(image, extent=[0, width/pixelsPerMeter, 0, height/pixelsPerMeter])
+        _draw_clusters_with_flow(ax, clusters, transitions, width_by_count, show_ids, arrow_size)
+
+        ax.set_title("Clusters (threshold-based merges)")
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        #ax.legend()
+        ax.figure.canvas.draw()
+class _CenterGrid:
+    """Uniform grid hash over cluster centers, with cells of about 'threshold' size."""
+    def __init__(self, threshold):
+        # Slightly larger cells, so rounding can't put two centers closer
+        # than the threshold more than one cell apart
+        self.cell_size = threshold*(1 + 1e-9)
+        self.cells = defaultdict(set)
+        self.cell_of = {}
+
+    def _cell(self, center):
+        return (math.floor(center[0]/self.cell_size), math.floor(center[1]/self.cell_size))
+
+    def insert(self, cid, center):
+        cell = self._cell(center)
+        self.cells[cell].add(cid)
+        self.cell_of[cid] = cell
+
+    def remove(self, cid):
+        cell = self.cell_of.pop(cid)
+        self.cells[cell].discard(cid)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def neighbours(self, center):
+        """IDs in the 3x3 cells around 'center'."""
+        cx, cy = self._cell(center)
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                cell = self.cells.get((gx, gy))
+                if cell:
+                    yield from cell
+
+def merge_all_within_threshold(clusters, threshold):
+    """
+    Continuously merges any two clusters whose centers are within 'threshold',
+    until no more merges can be done in a single pass.
+
+    Reaches the same result, through the same sequence of merges, as the
+    all-pairs scan of merge_all_within_threshold_bruteforce: the lowest ID
+    that has a higher ID within range absorbs the lowest such ID. Centers
+    are kept in a grid hash, so each lookup only checks nearby clusters, and
+    after a merge only the clusters around the moved center are re-checked.
+    Merged IDs are tracked with a ClusterUnionFind and centers are updated
+    from running sums; the flow_to and points lists are rebuilt once when
+    all merges are done.
+    """
+    clearPass = True
+    if threshold <= 0 or len(clusters) < 2:
+        return clusters, clearPass
+
+    grid = _CenterGrid(threshold)
+    for cid, cluster in clusters.items():
+        grid.insert(cid, cluster["center"])
+    # Merges only join IDs and add sums here, the flow_to and points lists
+    # are rebuilt once at the end
+    edges = flow_edges(clusters)
+    union_find = ClusterUnionFind(clusters.keys())
+    merged_into = {}
+    removed = {}
+
+    # All IDs before current_ids[pos] have no higher ID within range
+    current_ids = sorted(clusters.keys())
+    pos = 0
+    while pos < len(current_ids):
+        cid_i = current_ids[pos]
+        if cid_i not in clusters:
+            pos += 1
+            continue
+        center_i = clusters[cid_i]["center"]
+
+        cid_j = None
+        for cid in grid.neighbours(center_i):
+            if cid > cid_i and (cid_j is None or cid < cid_j):
+                if euclidean_distance(center_i, clusters[cid]["center"]) < threshold:
+                    cid_j = cid
+        if cid_j is None:
+            pos += 1
+            continue
+
+        dist = euclidean_distance(center_i, clusters[cid_j]["center"])
+        clearPass = False
+        print(f"Merging cluster {cid_j} into cluster {cid_i} (distance={dist:.2f})")
+        grid.remove(cid_i)
+        grid.remove(cid_j)
+        add_cluster_sums(clusters[cid_i], clusters[cid_j])
+        merged_into.setdefault(cid_i, []).append(cid_j)
+        removed[cid_j] = clusters.pop(cid_j)
+        union_find.union(cid_i, cid_j)
+        center_i = clusters[cid_i]["center"]
+        grid.insert(cid_i, center_i)
+
+        # The moved center may now be within range of a lower ID, which is
+        # where the scan continues
+        lowest = None
+        for cid in grid.neighbours(center_i):
+            if cid < cid_i and (lowest is None or cid < lowest):
+                if euclidean_distance(clusters[cid]["center"], center_i) < threshold:
+                    lowest = cid
+        if lowest is not None:
+            pos = bisect.bisect_left(current_ids, lowest)
+
+    if not clearPass:
+        materialize_flow(clusters, edges, union_find)
+        materialize_points(clusters, merged_into, removed)
+    return clusters, clearPass
+def merge_all_within_threshold_bruteforce(clusters, threshold):
+    """
+    Continuously merges any two clusters whose centers are within 'threshold',
+    until no more merges can be done in a single pass.
+    All-pairs reference implementation of merge_all_within_threshold.
+    """
+    
+    clearPass = True
+    merged_something = True
+    while merged_something:
+        merged_something = False
+        current_ids = sorted(clusters.keys())
+
+        for i_index in range(len(current_ids)):
+            cid_i = current_ids[i_index]
+            if cid_i not in clusters:
+                continue
+            for j_index in range(i_index+1, len(current_ids)):
+                cid_j = current_ids[j_index]
+                if cid_j not in clusters:
+                    continue
+
+                dist = euclidean_distance(clusters[cid_i]["center"], 
+                                          clusters[cid_j]["center"])
+                if dist < threshold:
+                    clearPass = False
+                    print(f"Merging cluster {cid_j} into cluster {cid_i} (distance={dist:.2f})")
+                    merge_clusters(cid_i, cid_j, clusters)
+                    merged_something = True
+                    break
+            if merged_something:
+                break
+    return clusters, clearPass
+class MergeDendrogram:
+    """
+    Merge history of the clusters of one clustering result, built once so
+    the clusters for any merging radius can be cut from it without merging
+    again.
+
+    The clusters are merged by centroid linkage, closest pair of centers
+    first, and every merge is recorded as (main ID, merged ID, distance),
+    the lower ID absorbing the higher one like merge_all_within_threshold.
+    Centroid distances may shrink after a merge, so the merges for a radius
+    are the longest prefix of the history whose distances all stay below
+    it. Cutting there leaves no two centers within the radius, the same
+    stopping point as repeating merge_all_within_threshold until a clear
+    pass (the order of the merges may differ).
+
+    With 'max_radius' the history stops at the first merge that needs at
+    least that radius, which is enough for every cut up to it.
+    """
+    def __init__(self, cluster_set, max_radius=None):
+        self.cluster_set = cluster_set
+        self.max_radius = max_radius
+        self.main_ids, self.other_ids, self.distances = self._build(cluster_set, max_radius)
+        # Smallest radius that allows each prefix of the history
+        self.reach = np.maximum.accumulate(self.distances) if len(self.distances) else self.distances
+
+    @classmethod
+    def from_segments(cls, points, starts, lengths, max_radius=None):
+        return cls(ClusterSet(points, starts, lengths), max_radius)
+
+    @staticmethod
+    def _nearest(centers, rows):
+        """Nearest other center (index, squared distance) for each of 'rows'."""
+        dist = (centers[rows, None, 0] - centers[None, :, 0])**2 + (centers[rows, None, 1] - centers[None, :, 1])**2
+        dist[np.arange(len(rows)), rows] = np.inf
+        nearest = np.argmin(dist, axis=1)
+        return nearest, dist[np.arange(len(rows)), nearest]
+
+    @classmethod
+    def _build(cls, cluster_set, max_radius):
+        alive = np.flatnonzero(cluster_set.alive)
+        sums = cluster_set.sums[alive].copy()
+        counts = cluster_set.counts[alive].astype(np.float64)
+        centers = sums / np.maximum(counts, 1)[:, None]
+        ids = cluster_set.ids[alive]
+        k = len(alive)
+        max_sq = np.inf if max_radius is None else max_radius**2
+
+        # Nearest neighbour (by squared distance) of every cluster, in row
+        # blocks to bound memory
+        nearest = np.zeros(k, dtype=np.int64)
+        nearest_sq = np.full(k, np.inf)
+        for block in range(0, k if k > 1 else 0, 1024):
+            rows = np.arange(block, min(block + 1024, k))
+            nearest[rows], nearest_sq[rows] = cls._nearest(centers, rows)
+
+        main_ids, other_ids, distances = [], [], []
+        remaining = k
+        for _ in range(k - 1):
+            i = int(np.argmin(nearest_sq))
+            if nearest_sq[i] >= max_sq:
+                break
+            a, b = sorted((i, int(nearest[i])))
+            main_ids.append(ids[a])
+            other_ids.append(ids[b])
+            distances.append(math.sqrt(nearest_sq[i]))
+
+            sums[a] += sums[b]
+            counts[a] += counts[b]
+            centers[a] = sums[a] / counts[a]
+            # A removed cluster is never nearest to anything again
+            centers[b] = np.inf
+            nearest_sq[b] = np.inf
+            remaining -= 1
+
+            to_a = (centers[:, 0] - centers[a, 0])**2 + (centers[:, 1] - centers[a, 1])**2
+            to_a[a] = np.inf
+            # Rows that pointed at a or b may have lost their nearest neighbour
+            stale = np.flatnonzero(((nearest == a) | (nearest == b)) & np.isfinite(centers[:, 0]))
+            stale = stale[stale != a]
+            if len(stale):
+                nearest[stale], nearest_sq[stale] = cls._nearest(centers, stale)
+            closer = to_a < nearest_sq
+            nearest[closer] = a
+            nearest_sq[closer] = to_a[closer]
+            nearest[a] = int(np.argmin(to_a))
+            nearest_sq[a] = to_a[nearest[a]]
+
+            # Drop the removed rows once they are half of the arrays
+            if remaining < len(ids)//2 and len(ids) > 256:
+                keep = np.isfinite(centers[:, 0])
+                position = np.cumsum(keep) - 1
+                sums, counts, centers, ids = sums[keep], counts[keep], centers[keep], ids[keep]
+                nearest, nearest_sq = position[nearest[keep]], nearest_sq[keep]
+
+        return (np.array(main_ids, dtype=np.int64), np.array(other_ids, dtype=np.int64),
+                np.array(distances, dtype=np.float64))
+
+    def merge_count(self, radius):
+        """Number of merges done at 'radius' (centers closer than 'radius' get merged)."""
+        if self.max_radius is not None and radius > self.max_radius:
+            raise ValueError(f"radius {radius} is above the max_radius {self.max_radius} of the dendrogram")
+        return int(np.searchsorted(self.reach, radius, side="left"))
+
+    def cut(self, radius):
+        """ClusterSet with the clusters at merging radius 'radius'."""
+        count = self.merge_count(radius)
+        clusters = self.cluster_set.copy()
+        clusters.merge_many(self.main_ids[:count], self.other_ids[:count])
+        return clusters
+
+    def cut_dictionary(self, radius):
+        """The clusters at 'radius' in the format of classesToClusterDictionary."""
+        return self.cut(radius).to_dictionary()
+
+def classesToClusterDictionary(classes):
+    clusters = {  }
+    for i, cluster in enumerate(classes):
+        temp_dict = { "id": i+1,
+            "center": cluster['center'],
+            "points": cluster['points'],
+            "flow_to": [i+2]}
+        cluster_sums(temp_dict)
+        if (i+1) == len(classes) :
+            temp_dict["flow_to"] = []
+        clusters[i+1] = temp_dict
+    return clusters
+def segmentsToClusterDictionary(points, starts, lengths, centers):
+    """
+    Same as classesToClusterDictionary, for the arrays returned by
+    segment_points_latest_only (or ThresholdSweep.segments) on 'points'.
+    """
+    clusters = {  }
+    for i, (start, length, center) in enumerate(zip(starts.tolist(), lengths.tolist(), centers.tolist())):
+        temp_dict = { "id": i+1,
+            "center": tuple(center),
+            "points": [tuple(pt) for pt in points[start:start + length].tolist()],
+            "flow_to": [i+2]}
+        cluster_sums(temp_dict)
+        if (i+1) == len(starts) :
+            temp_dict["flow_to"] = []
+        clusters[i+1] = temp_dict
+    return clusters
+if __name__ == "__main__":
+    # Example dictionary of clusters with 'flow_to' as lists
+    clusters = {
+        1: {
+            "id": 1,
+            "center": (1.0, 1.0),
+            "points": [(1, 1)],
+            # Suppose cluster 1 flows to clusters 2 and 3
+            "flow_to": [2]
+        },
+        2: {
+            "id": 2,
+            "center": (2.0, 2.0),
+            "points": [(2, 2), (2, 3)],
+            # Suppose cluster 2 flows to cluster 4
+            "flow_to": [3]
+        },
+        3: {
+            "id": 3,
+            "center": (5.0, 6.0),
+            "points": [(5, 6)],
+            "flow_to": [4]
+        },
+        4: {
+            "id": 4,
+            "center": (2.0, 2.0),
+            "points": [(2, 2), (2, 2)],
+            "flow_to": [5]
+        },
+        5: {
+            "id": 5,
+            "center": (9.0, 9.0),
+            "points": [(9, 9)],
+            "flow_to": [6]
+        },
+        6: {
+            "id": 6,
+            "center": (2.0, 2.0),
+            "points": [(1.5, 1.5)],
+            "flow_to": [7]
+        },
+        7: {
+            "id": 7,
+            "center": (5.0, 6.0),
+            "points": [(5.5, 6.5)],
+            "flow_to": [8]
+        },
+        8: {
+            "id": 8,
+            "center": (10, 10),
+            "points": [(10, 10)],
+            "flow_to": []
+        }
+    }
+
+    threshold = 2.0
+    # Regression check of the grid-based merge against the all-pairs scan
+    reference, _ = merge_all_within_threshold_bruteforce(copy.deepcopy(clusters), threshold)
+    indexed, _ = merge_all_within_threshold(copy.deepcopy(clusters), threshold)
+    assert reference == indexed, "merge_all_within_threshold differs from the all-pairs scan"
+
+    clusters2 = clusters.copy()
+    clearPass = False
+    passNo = 1
+    while clearPass == False:
+        clusters2, clearPass = merge_all_within_threshold(clusters2, threshold)
+        print("============= PASS No", passNo ,"=============")
+        
+        for cid, clus in clusters2.items():
+            print(f"Cluster {cid}:")
+            print(f"  Center: {clus['center']}")
+            print(f"  Points: {clus['points']}")
+            print(f"  Flows to: {clus['flow_to']}")
+        print("=============                =============")
+        passNo += 1
+
+
+    print("\n---- Clusters after merges ----")
+    for cid, clus in clusters2.items():
+        print(f"Cluster {cid}:")
+        print(f"  Center: {clus['center']}")
+        print(f"  Points: {clus['points']}")
+        print(f"  Flows to: {clus['flow_to']}")
+
+    # Finally, visualize
+    plot_clusters_with_flow(clusters)
+    plot_clusters_with_flow(clusters2)
@@ -0,0 +1,202 @@
+import numpy as np
+
+from .FlowGraph import TransitionMatrix
+
+__all__ = ["ClusterSet"]
+
+class ClusterSet:
+    """
+    Array-backed clusters of one track.
+
+    Instead of a dict with a "points" list of tuples per cluster, all the
+    points of the track live in one contiguous (N, 2) float array and every
+    cluster is an index range [start, start + length) into it. Per cluster
+    there is one entry in each of these arrays:
+        ids     : cluster ID (1, 2, ... like classesToClusterDictionary)
+        starts, lengths : index range of the cluster's own points
+        sums    : (K, 2) running coordinate sums
+        counts  : number of points (including the ones merged into it)
+        parent  : index of the cluster it was merged into (itself if alive)
+    The flow graph is an edge table (flow_src, flow_dst) of cluster indices,
+    transitions() gives it weighted by the number of transitions.
+
+    Merging two clusters only updates sums/counts/parent, no point is
+    copied. The points of a merged cluster are the ranges of all the
+    clusters that ended up in it, materialized only when asked for.
+    to_dictionary() gives the usual {id: {"id", "center", "points",
+    "flow_to"}} structure for existing callers.
+    """
+    __slots__ = ("points", "ids", "starts", "lengths", "sums", "counts", "parent", "flow_src", "flow_dst")
+
+    def __init__(self, points, starts, lengths):
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        k = len(self.starts)
+        self.ids = np.arange(1, k + 1)
+        self.counts = self.lengths.copy()
+        self.sums = self._range_sums(self.starts, self.lengths)
+        self.parent = np.arange(k)
+        # Consecutive clusters of the track flow into each other
+        self.flow_src = np.arange(k - 1)
+        self.flow_dst = np.arange(1, k)
+
+    def _range_sums(self, starts, lengths):
+        if len(starts) == 0:
+            return np.zeros((0, 2))
+        # reduceat over [start0, end0, start1, end1, ...], the even slots are the ranges
+        padded = np.vstack((self.points, np.zeros((1, 2))))
+        bounds = np.empty(2*len(starts), dtype=np.int64)
+        bounds[0::2] = starts
+        bounds[1::2] = starts + lengths
+        return np.add.reduceat(padded, bounds, axis=0)[0::2]
+
+    @classmethod
+    def from_segments(cls, points, starts, lengths, min_length=1):
+        """
+        Builds the set from contiguous segments of 'points', e.g. the output
+        of the latest-only segmentation. Segments shorter than 'min_length'
+        are left out, like drop_clusters_with_low_number_of_points.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        keep = lengths >= min_length
+        return cls(points, starts[keep], lengths[keep])
+
+    @classmethod
+    def from_classes(cls, classes):
+        """Builds the set from the list returned by classify_points_latest_only."""
+        lengths = np.array([len(c["points"]) for c in classes], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(classes) else lengths
+        points = [p for c in classes for p in c["points"]]
+        return cls(np.array(points, dtype=np.float64).reshape(-1, 2), starts, lengths)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    @property
+    def alive(self):
+        return self.parent == np.arange(len(self.parent))
+
+    @property
+    def centers(self):
+        """(K, 2) centroids; only the rows of alive clusters are meaningful."""
+        return self.sums / np.maximum(self.counts, 1)[:, None]
+
+    def index_of(self, cluster_id):
+        return int(cluster_id) - 1
+
+    def root(self, index):
+        """Index of the alive cluster that 'index' was merged into."""
+        while self.parent[index] != index:
+            index = self.parent[index]
+        return index
+
+    def roots(self):
+        """Root index of every cluster, resolved for all clusters at once."""
+        roots = self.parent.copy()
+        while True:
+            nxt = roots[roots]
+            if np.array_equal(nxt, roots):
+                return roots
+            roots = nxt
+
+    def merge(self, main_id, other_id):
+        """
+        Merges cluster 'other_id' into 'main_id' in O(1). Either ID may be
+        a cluster that was already merged away, its alive root is used;
+        nothing happens when both already are in the same cluster.
+        """
+        main = self.root(self.index_of(main_id))
+        other = self.root(self.index_of(other_id))
+        if main == other:
+            return
+        self.sums[main] += self.sums[other]
+        self.counts[main] += self.counts[other]
+        self.parent[other] = main
+
+    def merge_many(self, main_ids, other_ids):
+        """
+        Applies a sequence of merges at once, with the same clusters and
+        sums as calling merge() for each pair in order. Every 'other' must
+        still be alive when its merge comes up.
+        """
+        main = np.asarray(main_ids, dtype=np.int64) - 1
+        other = np.asarray(other_ids, dtype=np.int64) - 1
+        was_alive = np.flatnonzero(self.alive)
+        self.parent[other] = main
+        roots = self.roots()
+        totals = np.zeros_like(self.sums)
+        counts = np.zeros_like(self.counts)
+        np.add.at(totals, roots[was_alive], self.sums[was_alive])
+        np.add.at(counts, roots[was_alive], self.counts[was_alive])
+        alive = self.alive
+        self.sums[alive] = totals[alive]
+        self.counts[alive] = counts[alive]
+
+    def copy(self):
+        """Copy with its own merge state; the point array is shared."""
+        other = ClusterSet.__new__(ClusterSet)
+        other.points = self.points
+        for name in self.__slots__[1:]:
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    def point_indices(self, cluster_id):
+        """Indices into self.points of all the points of a cluster, in track order."""
+        members = np.flatnonzero(self.roots() == self.index_of(cluster_id))
+        if len(members) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(self.starts[m], self.starts[m] + self.lengths[m]) for m in members])
+
+    def labels(self):
+        """Per-point cluster ID (0 for points that are in no cluster)."""
+        labels = np.zeros(len(self.points), dtype=np.int32)
+        root_ids = self.ids[self.roots()]
+        for k in range(len(self.starts)):
+            labels[self.starts[k]:self.starts[k] + self.lengths[k]] = root_ids[k]
+        return labels
+
+    def flow_edges(self):
+        """Flow edges between alive cluster IDs, without duplicates and self loops."""
+        roots = self.roots()
+        src = self.ids[roots[self.flow_src]]
+        dst = self.ids[roots[self.flow_dst]]
+        edges = np.unique(np.column_stack((src, dst))[src != dst], axis=0)
+        return edges
+
+    def transitions(self):
+        """
+        TransitionMatrix of the alive clusters. The clusters' segments are in
+        track order, so the sequence of their root IDs is the label sequence
+        with every run of points already collapsed.
+        """
+        return TransitionMatrix.from_labels(self.ids[self.roots()])
+
+    def to_dictionary(self):
+        """
+        Compatibility view in the format of classesToClusterDictionary:
+            {id: {"id": id, "center": (cx, cy), "points": [(x, y), ...], "flow_to": [...],
+                  "sum": (sx, sy), "count": n}}
+        plus "flow_counts" {target: number of transitions} for clusters with
+        outgoing flow.
+        """
+        roots = self.roots()
+        centers = self.centers
+        clusters = {}
+        for index in np.flatnonzero(self.alive):
+            cid = int(self.ids[index])
+            clusters[cid] = {"id": cid,
+                             "center": tuple(centers[index].tolist()),
+                             "points": [],
+                             "flow_to": [],
+                             "sum": tuple(self.sums[index].tolist()),
+                             "count": int(self.counts[index])}
+        for k in range(len(self.starts)):
+            segment = self.points[self.starts[k]:self.starts[k] + self.lengths[k]]
+            clusters[int(self.ids[roots[k]])]["points"].extend(map(tuple, segment.tolist()))
+        transitions = self.transitions()
+        for src, dst, count in zip(*(column.tolist() for column in transitions.edges())):
+            clusters[src]["flow_to"].append(dst)
+            clusters[src].setdefault("flow_counts", {})[dst] = count
+        return clusters
@@ -0,0 +1,375 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import numpy as np
+
+__all__ = ["DistanceLog", "DistanceLogParser", "DistanceLogCache", "parseDistanceLog", "loadDistanceLog",
+           "iterDistanceLogChunks"]
+
+# Number format used by the RTLS gateway, e.g. 10.55, 7, -0.3, 1e-3
+_NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+
+# Characters around the values once a line is split on the quote character
+
+# End of a line's last value up to the start of the next line's in the fast path
+_LINE_BREAK = re.compile(r"\}[^\S\n]*\n\s*\{\0:")
+
+def _buildLinePattern(anchorCount):
+    """
+    Builds the regular expression for one well-formed log line:
+        {'TagName':'Tag1', 'Anchor1':10.55, 'Anchor2':37.81, 'Anchor3':51.31}
+    Anything else (other key order, missing anchors, double quotes...) is
+    left to the ast.literal_eval fallback.
+    """
+    pattern = r"^[ \t]*\{\s*'TagName'\s*:\s*'([^'\n]*)'"
+    for i in range(1, anchorCount + 1):
+        pattern += r"\s*,\s*'Anchor%d'\s*:\s*" % i + _NUMBER
+    pattern += r"\s*,?\s*\}[ \t\r]*$"
+    return re.compile(pattern, re.MULTILINE)
+
+class DistanceLog:
+    """
+    Parsed columns of a distance log.
+        tagIds    : (N,) int32 array, index into tagNames
+        distances : (N, anchorCount) float64 array, NaN where an anchor is missing
+        tagNames  : list of tag names in order of first appearance
+        fallbackLines : number of lines that needed the ast.literal_eval path
+    """
+    def __init__(self, tagIds, distances, tagNames, fallbackLines=0):
+        self.tagIds = tagIds
+        self.distances = distances
+        self.tagNames = tagNames
+        self.fallbackLines = fallbackLines
+
+    def __len__(self):
+        return len(self.tagIds)
+
+class DistanceLogParser:
+    """
+    Parser for the dict-per-line distance log format.
+    Blocks written exactly in the gateway layout are split into columns with
+    a few string operations, other blocks are matched with a regular
+    expression and only the lines it can't handle go through ast.literal_eval.
+    The tag name → id mapping is kept between calls, so the same parser can be
+    fed consecutive blocks of one file.
+    With skipInvalid, lines that can't be parsed at all are counted in
+    invalidLines and dropped instead of raising (useful for live feeds).
+    """
+    def __init__(self, anchorCount=3, skipInvalid=False):
+        self.anchorCount = anchorCount
+        self.skipInvalid = skipInvalid
+        self.tagNames = []
+        self.tagIndex = {}
+        self.fallbackLines = 0
+        self.invalidLines = 0
+        self._pattern = _buildLinePattern(anchorCount)
+
+    def tagId(self, tagName):
+        tid = self.tagIndex.get(tagName)
+        if tid is None:
+            tid = len(self.tagNames)
+            self.tagIndex[tagName] = tid
+            self.tagNames.append(tagName)
+        return tid
+
+    def _columnsFromMatches(self, matches):
+        if not matches:
+            return np.empty(0, dtype=np.int32), np.empty((0, self.anchorCount))
+        table = np.array(matches)
+        distances = table[:, 1:].astype(np.float64)
+        names, inverse = np.unique(table[:, 0], return_inverse=True)
+        # np.unique sorts the names, keep ids in order of first appearance instead
+        firstSeen = np.full(len(names), len(inverse))
+        np.minimum.at(firstSeen, inverse, np.arange(len(inverse)))
+        lookup = np.empty(len(names), dtype=np.int32)
+        for u in np.argsort(firstSeen, kind="stable"):
+            lookup[u] = self.tagId(str(names[u]))
+        return lookup[inverse.ravel()], distances
+
+    def _parseSlow(self, line):
+        """Parses a single line with ast.literal_eval, missing anchors become NaN."""
+        row_data = ast.literal_eval(line)
+        tagId = self.tagId(row_data["TagName"])
+        row = [float(row_data.get("Anchor%d" % i, np.nan)) for i in range(1, self.anchorCount + 1)]
+        return tagId, row
+
+    def _parseBlockFast(self, block):
+        """
+        Fast path for blocks where every line has exactly the layout written
+        by the gateway. Splitting on the quote character turns the block into
+        a flat list with a fixed period per line, so keys and values are
+        checked and extracted with list slices instead of per-line parsing.
+        Returns None if the block doesn't follow the layout.
+        """
+        if "\0" in block:
+            return None
+        tokens = block.split("'")
+        period = 2*(self.anchorCount + 2)
+        n = (len(tokens) - 1) // period
+        if n == 0 or len(tokens) != n*period + 1 or tokens[0].strip() != "{":
+            return None
+        if (tokens[1::period].count("TagName") != n or tokens[2::period].count(":") != n
+                or tokens[4::period].count(", ") != n):
+            return None
+
+        distances = np.empty((n, self.anchorCount))
+        for k in range(1, self.anchorCount + 1):
+            if tokens[3 + 2*k::period].count("Anchor%d" % k) != n:
+                return None
+            # Join the value tokens with NUL, which the block doesn't contain, so
+            # every separator between two lines can be checked in one split
+            column = "\0".join(tokens[4 + 2*k::period])
+            if column[:1] != ":":
+                return None
+            if k < self.anchorCount:
+                # ":<value>, " between two anchors
+                if column[-2:] != ", ":
+                    return None
+                values = column[1:-2].split(", \0:")
+            else:
+                # ":<value>}", the line break and the "{" of the next line
+                values = _LINE_BREAK.split(column[1:])
+                last = values[-1].rstrip()
+                if last[-1:] != "}":
+                    return None
+                values[-1] = last[:-1]
+            if len(values) != n:
+                return None
+            # float() also takes nan/inf, which literal_eval doesn't
+            if "n" in "".join(values).lower():
+                return None
+            try:
+                distances[:, k - 1] = list(map(float, values))
+            except ValueError:
+                return None
+
+        tags = tokens[3::period]
+        # dict keeps the order of first appearance
+        for tagName in dict.fromkeys(tags):
+            self.tagId(tagName)
+        tagIds = np.array(list(map(self.tagIndex.__getitem__, tags)), dtype=np.int32)
+        return tagIds, distances
+
+    def parseBlock(self, block):
+        """
+        Parses a block of complete lines.
+        Returns (tagIds, distances) for the non-empty lines of the block.
+        """
+        columns = self._parseBlockFast(block)
+        if columns is not None:
+            return columns
+
+        matches = self._pattern.findall(block)
+        lines = block.splitlines()
+        if len(matches) == len(lines) - lines.count(""):
+            return self._columnsFromMatches(matches)
+
+        # Some lines are not in the expected layout, handle the block line by line
+        tagIds = np.empty(len(lines), dtype=np.int32)
+        distances = np.empty((len(lines), self.anchorCount))
+        n = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            m = self._pattern.match(line)
+            if m is not None:
+                tagIds[n] = self.tagId(m.group(1))
+                distances[n] = [float(v) for v in m.groups()[1:]]
+            else:
+                self.fallbackLines += 1
+                try:
+                    tagIds[n], distances[n] = self._parseSlow(line)
+                except Exception:
+                    # literal_eval can also raise OverflowError, RecursionError or MemoryError
+                    if not self.skipInvalid:
+                        raise
+                    self.invalidLines += 1
+                    continue
+            n += 1
+        return tagIds[:n], distances[:n]
+
+def _iterBlocks(f, blockSize):
+    """Yields blocks of complete lines read from the text file 'f'."""
+    remainder = ""
+    while True:
+        block = f.read(blockSize)
+        if not block:
+            if remainder:
+                yield remainder
+            return
+        block = remainder + block
+        cut = block.rfind("\n") + 1
+        block, remainder = block[:cut], block[cut:]
+        if block:
+            yield block
+
+def parseDistanceLog(filepath, anchorCount=3, blockSize=1 << 22):
+    """
+    Reads a whole distance log in blocks of 'blockSize' characters and fills
+    preallocated numeric columns. Returns a DistanceLog.
+    """
+    parser = DistanceLogParser(anchorCount)
+
+    # Preallocate from an estimate of the number of lines, grow if needed
+    capacity = max(1024, os.path.getsize(filepath) // 60)
+    tagIds = np.empty(capacity, dtype=np.int32)
+    distances = np.empty((capacity, anchorCount))
+    n = 0
+
+    with open(filepath, "r") as f:
+        for block in _iterBlocks(f, blockSize):
+            blockTagIds, blockDistances = parser.parseBlock(block)
+            m = len(blockTagIds)
+            if n + m > capacity:
+                capacity = max(2*capacity, n + m)
+                tagIds = np.resize(tagIds, capacity)
+                distances = np.resize(distances, (capacity, anchorCount))
+            tagIds[n:n + m] = blockTagIds
+            distances[n:n + m] = blockDistances
+            n += m
+
+    return DistanceLog(tagIds[:n].copy(), distances[:n].copy(), parser.tagNames, parser.fallbackLines)
+
+def iterDistanceLogChunks(filepath, anchorCount=3, chunkSize=1 << 16, blockSize=1 << 20):
+    """
+    Generator version of parseDistanceLog. Yields DistanceLog chunks of
+    'chunkSize' lines (the last one can be shorter), so memory use depends
+    on chunkSize and blockSize only, not on the size of the file.
+    Tag ids are consistent between chunks; tagNames is the list of tags seen
+    so far. fallbackLines is the running total of the file.
+    """
+    parser = DistanceLogParser(anchorCount)
+    tagIds = np.empty(chunkSize, dtype=np.int32)
+    distances = np.empty((chunkSize, anchorCount))
+    n = 0
+    with open(filepath, "r") as f:
+        for block in _iterBlocks(f, blockSize):
+            blockTagIds, blockDistances = parser.parseBlock(block)
+            start = 0
+            while start < len(blockTagIds):
+                m = min(chunkSize - n, len(blockTagIds) - start)
+                tagIds[n:n + m] = blockTagIds[start:start + m]
+                distances[n:n + m] = blockDistances[start:start + m]
+                n += m
+                start += m
+                if n == chunkSize:
+                    yield DistanceLog(tagIds.copy(), distances.copy(), parser.tagNames, parser.fallbackLines)
+                    n = 0
+    if n > 0:
+        yield DistanceLog(tagIds[:n].copy(), distances[:n].copy(), parser.tagNames, parser.fallbackLines)
+
+class DistanceLogCache:
+    """
+    Sidecar cache of a parsed distance log, stored next to the log in the
+    directory '<log file>.rtlscache'. Every column is a plain .npy file so it
+    can be opened with np.load(..., mmap_mode="r") without copying.
+
+    The cache is bound to the size, modification time and a content hash of
+    the source file. The hash covers the first and last 'hashSpan' bytes of
+    the file, so checking it costs the same for any file size. When any of
+    them differs the cache is dropped.
+    Other arrays derived from the log (e.g. trilaterated positions per anchor
+    set) can be stored with storeArray/loadArray and are dropped with it.
+    """
+    VERSION = 1
+
+    def __init__(self, filepath, hashSpan=1 << 16):
+        self.filepath = filepath
+        self.cacheDir = filepath + ".rtlscache"
+        self.hashSpan = hashSpan
+
+    def _signature(self):
+        stat = os.stat(self.filepath)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.filepath, "rb") as f:
+            digest.update(f.read(self.hashSpan))
+            if stat.st_size > self.hashSpan:
+                f.seek(max(self.hashSpan, stat.st_size - self.hashSpan))
+                digest.update(f.read(self.hashSpan))
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+    def _metaPath(self):
+        return os.path.join(self.cacheDir, "meta.json")
+
+    def _readMeta(self):
+        try:
+            with open(self._metaPath(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def isValid(self):
+        meta = self._readMeta()
+        return (meta is not None and meta.get("version") == self.VERSION
+                and meta.get("source") == self._signature())
+
+    def clear(self):
+        shutil.rmtree(self.cacheDir, ignore_errors=True)
+
+    def storeArray(self, name, array):
+        """Writes 'array' as <name>.npy, the file is renamed into place once complete."""
+        os.makedirs(self.cacheDir, exist_ok=True)
+        path = os.path.join(self.cacheDir, name + ".npy")
+        tmpPath = path + ".tmp"
+        with open(tmpPath, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmpPath, path)
+
+    def loadArray(self, name):
+        """Memory-maps <name>.npy, returns None if it isn't cached."""
+        path = os.path.join(self.cacheDir, name + ".npy")
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def loadLog(self):
+        """Returns the cached DistanceLog (memory-mapped) or None if the cache is stale."""
+        if not self.isValid():
+            return None
+        meta = self._readMeta()
+        tagIds = self.loadArray("tagIds")
+        distances = self.loadArray("distances")
+        if tagIds is None or distances is None:
+            return None
+        return DistanceLog(tagIds, distances, meta["tagNames"], meta["fallbackLines"])
+
+    def storeLog(self, log):
+        # Signature is taken before writing, a file modified meanwhile invalidates the cache
+        signature = self._signature()
+        self.clear()
+        self.storeArray("tagIds", log.tagIds)
+        self.storeArray("distances", log.distances)
+        meta = {"version": self.VERSION,
+                "source": signature,
+                "anchorCount": int(log.distances.shape[1]),
+                "tagNames": list(log.tagNames),
+                "fallbackLines": log.fallbackLines}
+        tmpPath = self._metaPath() + ".tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmpPath, self._metaPath())
+
+def loadDistanceLog(filepath, anchorCount=3, useCache=True):
+    """
+    Same as parseDistanceLog, but reuses the DistanceLogCache of the file when
+    it is still valid and creates it otherwise.
+    """
+    if not useCache:
+        return parseDistanceLog(filepath, anchorCount)
+
+    cache = DistanceLogCache(filepath)
+    log = cache.loadLog()
+    if log is not None and log.distances.shape[1] == anchorCount:
+        return log
+
+    log = parseDistanceLog(filepath, anchorCount)
+    try:
+        cache.storeLog(log)
+    except OSError as e:
+        # Read-only location, the log is still usable without the cache
+        print("Could not write the distance log cache:", e)
+    return log
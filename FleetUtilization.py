@@ -0,0 +1,139 @@
+import os
+import sys
+import multiprocessing
+import numpy as np
+
+from .ResourceUtilization import (Area, AreaLabeler, ZoneIndex, StateSummary, iterPointsFromCSV, loadZones,
+                                  transformPointChunkFromAnyLogicSimulation, utilizationGraph, seconds_to_hm, EXAMPLE_AREAS)
+
+__all__ = ["fleetUtilization", "printFleetReport"]
+
+# Labeler of the worker process, built once by _initWorker
+_labeler = None
+
+def _makeLabeler(zones):
+    """Raster labeler for rectangles only, grid bucket index as soon as there is a polygon."""
+    if all(isinstance(zone, Area) for zone in zones):
+        return AreaLabeler(zones)
+    return ZoneIndex(zones)
+
+def _initWorker(zones):
+    global _labeler
+    _labeler = _makeLabeler(zones)
+
+def _loadTrack(track, anyLogicOrigin):
+    """(N, 2) positions of a track given as an array or as a CSV path."""
+    if isinstance(track, str):
+        chunks = list(iterPointsFromCSV(track))
+        points = np.concatenate(chunks) if chunks else np.empty((0, 2))
+        if anyLogicOrigin is not None:
+            points = transformPointChunkFromAnyLogicSimulation(points, *anyLogicOrigin)
+        return points
+    return np.asarray(track, dtype=np.float64).reshape(-1, 2)
+
+def _tagUtilization(task):
+    """Worker: labels one tag's track and summarizes it."""
+    tag, track, anyLogicOrigin, idleStateName, intervalSeconds, sumPeriod, keepLabels = task
+    codes = _labeler.label_points(_loadTrack(track, anyLogicOrigin))
+    summary = StateSummary(codes, _labeler.names, interval_seconds=intervalSeconds)
+    idleCode = summary.code_of(idleStateName)
+    series, _, _ = utilizationGraph(codes, sumPeriod=sumPeriod, idleStateName=idleCode)
+    result = {"tag": tag,
+              "samples": len(codes),
+              "utilization": summary.utilization(idleStateName) if len(codes) else float("nan"),
+              "series": series,
+              "summary": summary}
+    if keepLabels:
+        result["labels"] = codes
+    return result
+
+def _trackSize(track):
+    if isinstance(track, str):
+        return os.path.getsize(track)
+    return len(track)
+
+def fleetUtilization(tracks, zones, processes=None, idleStateName="IDLE", intervalSeconds=1, sumPeriod=3600,
+                     anyLogicOrigin=None, keepLabels=False):
+    """
+    Zone labels, utilization series and state summaries of a whole fleet,
+    one tag per task on a process pool.
+
+    'tracks' is {tag: track} or a list of tracks, where a track is an (N, 2)
+    position array or the path of a CSV export (the tag is then the file
+    name). 'zones' is a list of Area/PolygonArea objects, or the path of a
+    zone config for loadZones. The biggest tracks are handed out first, so
+    the run takes about as long as the slowest single tag.
+
+    Returns the fleet report:
+        "tags"    : {tag: {"samples", "utilization", "series", "summary"
+                    (StateSummary), "labels" (with keepLabels)}}
+        "names"   : zone names by code
+        "utilization"     : fleet utilization over all samples
+        "meanUtilization" : mean of the per-tag utilizations
+        "dwell"   : {zone name: seconds} summed over the fleet
+        "series", "xAxis" : mean per-tag utilization every 'sumPeriod' samples
+    """
+    if isinstance(zones, str):
+        zones = loadZones(zones)
+    if not isinstance(tracks, dict):
+        named = {}
+        for i, track in enumerate(tracks):
+            tag = os.path.splitext(os.path.basename(track))[0] if isinstance(track, str) else str(i)
+            named[tag if tag not in named else f"{tag}_{i}"] = track
+        tracks = named
+
+    tags = sorted(tracks, key=lambda tag: _trackSize(tracks[tag]), reverse=True)
+    tasks = [(tag, tracks[tag], anyLogicOrigin, idleStateName, intervalSeconds, sumPeriod, keepLabels) for tag in tags]
+    if processes == 1 or len(tasks) <= 1:
+        _initWorker(zones)
+        results = [_tagUtilization(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, initializer=_initWorker, initargs=(zones,)) as pool:
+            results = list(pool.imap_unordered(_tagUtilization, tasks))
+    perTag = {result.pop("tag"): result for result in results}
+    return _mergeReport({tag: perTag[tag] for tag in tracks}, _makeLabeler(zones).names, idleStateName,
+                        intervalSeconds, sumPeriod)
+
+def _mergeReport(perTag, names, idleStateName, intervalSeconds, sumPeriod):
+    """Joins the per-tag results into the fleet report."""
+    dwell = np.zeros(len(names), dtype=np.int64)
+    for result in perTag.values():
+        tagDwell = result["summary"].dwell
+        dwell[:len(tagDwell)] += tagDwell
+    samples = int(dwell.sum())
+    idle = int(dwell[names.index(idleStateName)]) if idleStateName in names else 0
+
+    # Per-period mean over the tags that still have data at that point
+    periods = max((len(result["series"]) for result in perTag.values()), default=0)
+    total = np.zeros(periods)
+    count = np.zeros(periods)
+    for result in perTag.values():
+        series = np.asarray(result["series"], dtype=np.float64)
+        total[:len(series)] += series
+        count[:len(series)] += 1
+
+    utilizations = [result["utilization"] for result in perTag.values() if result["samples"]]
+    return {"tags": perTag,
+            "names": names,
+            "utilization": 1 - idle/samples if samples else float("nan"),
+            "meanUtilization": float(np.mean(utilizations)) if utilizations else float("nan"),
+            "dwell": {name: int(d)*intervalSeconds for name, d in zip(names, dwell.tolist())},
+            "series": (total/np.maximum(count, 1)).tolist(),
+            "xAxis": [seconds_to_hm(i*sumPeriod*intervalSeconds) for i in range(1, periods + 1)]}
+
+def printFleetReport(report):
+    print("Fleet utilization: %.3f (mean per tag %.3f)" % (report["utilization"], report["meanUtilization"]))
+    for tag, result in report["tags"].items():
+        print(f"  {tag}: {result['utilization']:.3f} over {seconds_to_hm(result['samples']*result['summary'].interval_seconds)}")
+    print("Time per zone:")
+    for name, seconds in report["dwell"].items():
+        print(f"  {name}: {seconds_to_hm(seconds)}")
+
+if __name__ == "__main__":
+    # python -m package.FleetUtilization [zones.json] track1.csv track2.csv ...
+    args = sys.argv[1:]
+    zones = [Area(name, p1, p2) for name, p1, p2 in EXAMPLE_AREAS]
+    if args and args[0].lower().endswith(".json"):
+        zones = args.pop(0)
+    report = fleetUtilization(args, zones, sumPeriod=60, anyLogicOrigin=(35, 36))
+    printFleetReport(report)
@@ -0,0 +1,126 @@
+import numpy as np
+
+__all__ = ["TransitionMatrix"]
+
+class TransitionMatrix:
+    """
+    Weighted flow graph of a track: how many times it went from one cluster
+    straight to another.
+
+    The counts are a sparse matrix in CSR form over the cluster IDs that
+    occur in the track:
+        ids     : sorted cluster IDs, row/column i is cluster ids[i]
+        indptr  : the out-edges of row i are indptr[i]:indptr[i + 1]
+        sources, targets : row and column index of each edge
+        counts  : number of transitions along each edge
+    The visit sequence (cluster index of each stay, in track order) is kept
+    as well for the k-step path queries.
+    """
+    __slots__ = ("ids", "indptr", "sources", "targets", "counts", "visits")
+
+    def __init__(self, visits):
+        """'visits' is the sequence of cluster IDs visited, without repeats."""
+        self.ids, self.visits = np.unique(np.asarray(visits, dtype=np.int64), return_inverse=True)
+        self.visits = self.visits.ravel()
+        n = len(self.ids)
+        # One key per (source, target) pair, unique() sorts them by source then target
+        keys, counts = np.unique(self.visits[:-1]*n + self.visits[1:], return_counts=True)
+        self.sources = keys // max(n, 1)
+        self.targets = keys % max(n, 1)
+        self.counts = counts
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(self.sources, minlength=n))))
+
+    @classmethod
+    def from_labels(cls, labels, ignore=0):
+        """
+        Builds the matrix in one pass over a per-point (or per-segment)
+        cluster label sequence. Labels equal to 'ignore' (points in no
+        cluster) are skipped and a run of the same label is one visit, so
+        A, A, 0, B counts one A → B transition.
+        """
+        labels = np.asarray(labels).ravel()
+        labels = labels[labels != ignore]
+        if len(labels):
+            first = np.empty(len(labels), dtype=bool)
+            first[0] = True
+            first[1:] = labels[1:] != labels[:-1]
+            labels = labels[first]
+        return cls(labels)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def index_of(self, cluster_id):
+        index = int(np.searchsorted(self.ids, cluster_id))
+        if index == len(self.ids) or self.ids[index] != cluster_id:
+            raise KeyError(cluster_id)
+        return index
+
+    def edges(self):
+        """(source IDs, target IDs, counts) of all edges, sorted by source then target."""
+        return self.ids[self.sources], self.ids[self.targets], self.counts
+
+    def count(self, source_id, target_id):
+        """Number of transitions from 'source_id' to 'target_id'."""
+        try:
+            source = self.index_of(source_id)
+            target = self.index_of(target_id)
+        except KeyError:
+            return 0
+        row = slice(self.indptr[source], self.indptr[source + 1])
+        position = np.searchsorted(self.targets[row], target)
+        if position < self.indptr[source + 1] - self.indptr[source] and self.targets[row][position] == target:
+            return int(self.counts[row][position])
+        return 0
+
+    def to_dense(self):
+        """The (n, n) count matrix, rows and columns in the order of self.ids."""
+        dense = np.zeros((len(self.ids), len(self.ids)), dtype=np.int64)
+        dense[self.sources, self.targets] = self.counts
+        return dense
+
+    def successors(self, cluster_id):
+        """[(target ID, count), ...] of one cluster, most frequent first."""
+        source = self.index_of(cluster_id)
+        row = slice(self.indptr[source], self.indptr[source + 1])
+        order = np.argsort(-self.counts[row], kind="stable")
+        return list(zip(self.ids[self.targets[row][order]].tolist(), self.counts[row][order].tolist()))
+
+    def top_transitions(self, k=10):
+        """The 'k' most frequent transitions as [(source ID, target ID, count), ...]."""
+        order = np.argsort(-self.counts, kind="stable")[:k]
+        return list(zip(self.ids[self.sources[order]].tolist(),
+                        self.ids[self.targets[order]].tolist(),
+                        self.counts[order].tolist()))
+
+    def out_degree(self, weighted=False):
+        """
+        Out-degree of every cluster (aligned with self.ids): the number of
+        distinct targets, or with 'weighted' the number of transitions out.
+        """
+        weights = self.counts if weighted else None
+        return np.bincount(self.sources, weights=weights, minlength=len(self.ids)).astype(np.int64)
+
+    def in_degree(self, weighted=False):
+        """Like out_degree, for the transitions into every cluster."""
+        weights = self.counts if weighted else None
+        return np.bincount(self.targets, weights=weights, minlength=len(self.ids)).astype(np.int64)
+
+    def paths(self, steps=2, top=10):
+        """
+        Most frequent paths of 'steps' consecutive transitions, as
+        [((ID0, ID1, ..., IDsteps), count), ...].
+        """
+        if len(self.visits) <= steps:
+            return []
+        windows = np.lib.stride_tricks.sliding_window_view(self.visits, steps + 1)
+        paths, counts = np.unique(windows, axis=0, return_counts=True)
+        order = np.argsort(-counts, kind="stable")[:top]
+        return [(tuple(self.ids[paths[i]].tolist()), int(counts[i])) for i in order]
+
+    def flow_lists(self):
+        """{ID: [target IDs]} in the format of the clusters' flow_to lists."""
+        flows = {}
+        for source, cluster_id in enumerate(self.ids.tolist()):
+            flows[cluster_id] = self.ids[self.targets[self.indptr[source]:self.indptr[source + 1]]].tolist()
+        return flows
@@ -0,0 +1,399 @@
+import os
+import time
+import asyncio
+import struct
+import logging
+import numpy as np
+
+from .DistanceLogReader import DistanceLogParser
+from .trilateration import precompute_anchor_terms, trilateration_2d_batch, LeastSquaresTrilateration
+
+__all__ = ["DistanceLogFollower", "IngestionServer", "encodeBinaryRecord"]
+
+_log = logging.getLogger(__name__)
+
+# Compact binary framing of one distance record:
+#   uint8 0xA5, uint8 length of the tag name, uint8 number of anchors,
+#   tag name (utf-8), one little-endian float32 distance per anchor (Anchor1..)
+# Text records are the usual "{'TagName':'Tag1', 'Anchor1':10.55, ...}" lines.
+FRAME_MAGIC = 0xA5
+_FRAME_HEADER = struct.Struct("<BBB")
+
+def encodeBinaryRecord(tagName, distances):
+    name = tagName.encode("utf-8")
+    return _FRAME_HEADER.pack(FRAME_MAGIC, len(name), len(distances)) + name + struct.pack("<%df" % len(distances), *distances)
+
+def _decodeRecords(buffer):
+    """
+    Splits a byte buffer holding text lines and binary frames.
+    Returns (textLines, binaryRecords, rest) where rest is the incomplete
+    tail of the buffer.
+    """
+    textLines = []
+    binaryRecords = []
+    pos = 0
+    size = len(buffer)
+    while pos < size:
+        if buffer[pos] == FRAME_MAGIC:
+            if pos + _FRAME_HEADER.size > size:
+                break
+            _, nameLength, count = _FRAME_HEADER.unpack_from(buffer, pos)
+            end = pos + _FRAME_HEADER.size + nameLength + 4*count
+            if end > size:
+                break
+            nameStart = pos + _FRAME_HEADER.size
+            tagName = bytes(buffer[nameStart:nameStart + nameLength]).decode("utf-8", errors="replace")
+            binaryRecords.append((tagName, struct.unpack_from("<%df" % count, buffer, nameStart + nameLength)))
+            pos = end
+        else:
+            newline = buffer.find(b"\n", pos)
+            if newline < 0:
+                break
+            textLines.append(bytes(buffer[pos:newline]).decode("utf-8", errors="replace"))
+            pos = newline + 1
+    return textLines, binaryRecords, buffer[pos:]
+
+class DistanceLogFollower:
+    """
+    Follows a distance log that is still being written (like 'tail -F').
+    Every poll() reads only the bytes appended since the previous one, parses
+    the complete lines, trilaterates them in one batch and pushes the valid
+    positions to the subscribers:
+        callback(positions, tagIds, tagNames)
+    with positions an (M, 2) array, tagIds an (M,) array and tagNames the
+    list the ids refer to.
+
+    Rotation (the path now points to a new file) is handled by finishing the
+    old file and then reading the new one from the start. Truncation (the
+    file got shorter than the current offset) restarts from the start.
+    """
+    def __init__(self, filepath, anchors, fromStart=True):
+        self.filepath = filepath
+        self.anchors = anchors
+        self.parser = DistanceLogParser(anchorCount=len(anchors), skipInvalid=True)
+        self.subscribers = []
+        if len(anchors) == 3:
+            self._terms = precompute_anchor_terms(anchors)
+            self._solver = None
+        else:
+            self._terms = None
+            self._solver = LeastSquaresTrilateration(anchors)
+
+        self._file = None
+        self._inode = None
+        self._pending = b""  # incomplete last line
+        self.offset = 0
+        self._open()
+        if not fromStart and self._file is not None:
+            self._file.seek(0, os.SEEK_END)
+            self.offset = self._file.tell()
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        self.close()
+        try:
+            self._file = open(self.filepath, "rb")
+        except FileNotFoundError:
+            # Between a rotation and the creation of the new file
+            self._inode = None
+            return
+        inode = os.fstat(self._file.fileno()).st_ino
+        if inode == self._inode:
+            # Same file opened again after close(), carry on where it stopped
+            # (poll() still notices if it was truncated in between)
+            self._file.seek(self.offset)
+            return
+        self._inode = inode
+        self._pending = b""
+        self.offset = 0
+
+    def _readAppended(self):
+        data = self._file.read()
+        self.offset += len(data)
+        return data
+
+    def poll(self):
+        """Processes the data appended since the last call, returns the number of new positions."""
+        data = b""
+        if self._file is None:
+            self._open()
+            if self._file is None:
+                return 0
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            stat = None
+
+        if stat is not None and stat.st_ino != self._inode:
+            # Rotated: drain what is left of the old file, then switch
+            data = self._pending + self._readAppended()
+            if data and not data.endswith(b"\n"):
+                data += b"\n"
+            self._open()
+        elif stat is not None and stat.st_size < self.offset:
+            # Truncated: the old partial line is no longer valid
+            self._file.seek(0)
+            self.offset = 0
+            self._pending = b""
+
+        if self._file is not None:
+            data += self._pending + self._readAppended()
+        cut = data.rfind(b"\n") + 1
+        self._pending = data[cut:]
+        if cut == 0:
+            return 0
+
+        tagIds, distances = self.parser.parseBlock(data[:cut].decode("utf-8", errors="replace"))
+        if len(tagIds) == 0:
+            return 0
+        if self._solver is None:
+            positions, valid = trilateration_2d_batch(distances, self._terms)
+        else:
+            positions, _, valid = self._solver.solve(distances)
+        positions, tagIds = positions[valid], tagIds[valid]
+        if len(positions) > 0:
+            for callback in self.subscribers:
+                callback(positions, tagIds, self.parser.tagNames)
+        return len(positions)
+
+    def follow(self, interval=0.1, stopEvent=None):
+        """
+        Polls the file every 'interval' seconds until stopEvent (e.g. a
+        threading.Event) is set. Without stopEvent it runs until interrupted.
+        The file stays open, so a later poll() or follow() continues from
+        the same offset; call close() when done.
+        """
+        while stopEvent is None or not stopEvent.is_set():
+            if self.poll() == 0:
+                if stopEvent is not None:
+                    stopEvent.wait(interval)
+                else:
+                    time.sleep(interval)
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        # Every datagram holds complete records, a missing final newline is allowed
+        if data[:1] != bytes([FRAME_MAGIC]) and not data.endswith(b"\n"):
+            data += b"\n"
+        textLines, binaryRecords, _ = _decodeRecords(data)
+        try:
+            self.server._inbound.put_nowait((textLines, binaryRecords))
+        except asyncio.QueueFull:
+            # UDP can't push back on the sender, the datagram is dropped
+            self.server.droppedDatagrams += 1
+
+class IngestionServer:
+    """
+    Local asyncio service for live RTLS distance records.
+
+    Records arrive over UDP and/or TCP, either as text lines in the
+    TStransporter.txt format or as binary frames (see encodeBinaryRecord).
+    They are collected into batches of up to 'batchSize' records and each
+    batch is trilaterated with one vectorized call. The valid positions are
+    fanned out to the subscribers as (positions, tagIds, tagNames).
+
+    Backpressure: the inbound queue and every subscriber queue are bounded.
+    A slow subscriber blocks the batcher, a full inbound queue stops the
+    server from reading TCP connections (so TCP flow control slows the
+    senders) and drops UDP datagrams, counted in droppedDatagrams.
+
+    A batch that fails to solve and a subscriber callback that raises are
+    logged and dropped (counted in failedBatches), the service keeps running.
+    """
+    def __init__(self, anchors, host="127.0.0.1", udpPort=None, tcpPort=None,
+                 batchSize=4096, queueSize=1024):
+        self.anchors = anchors
+        self.host = host
+        self.udpPort = udpPort
+        self.tcpPort = tcpPort
+        self.batchSize = batchSize
+        self.queueSize = queueSize
+        self.parser = DistanceLogParser(anchorCount=len(anchors), skipInvalid=True)
+        if len(anchors) == 3:
+            self._terms = precompute_anchor_terms(anchors)
+            self._solver = None
+        else:
+            self._terms = None
+            self._solver = LeastSquaresTrilateration(anchors)
+
+        self.udpAddress = None
+        self.tcpAddress = None
+        self.droppedDatagrams = 0
+        self.failedBatches = 0
+        self.receivedRecords = 0
+        self.publishedPositions = 0
+        self._inbound = None
+        self._subscribers = []
+        self._callbackQueues = []
+        self._tasks = []
+        self._udpTransport = None
+        self._tcpServer = None
+
+    def subscribe(self, callback=None, maxsize=16):
+        """
+        Returns a bounded asyncio.Queue receiving (positions, tagIds, tagNames)
+        for every batch. With 'callback', a task calls callback(positions,
+        tagIds, tagNames) for each batch instead and the queue is internal.
+        """
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        if callback is not None:
+            self._callbackQueues.append(queue)
+            self._tasks.append(asyncio.ensure_future(self._runConsumer(queue, callback)))
+        return queue
+
+    async def _runConsumer(self, queue, callback):
+        while True:
+            batch = await queue.get()
+            try:
+                callback(*batch)
+            except Exception:
+                # A failing callback must not stop the consumer, or its queue
+                # fills up, blocks the batcher and stop() never returns
+                self.failedBatches += 1
+                _log.exception("Subscriber callback failed, batch dropped")
+            finally:
+                queue.task_done()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._inbound = asyncio.Queue(self.queueSize)
+        self._tasks.append(asyncio.ensure_future(self._batcher()))
+        if self.udpPort is not None:
+            self._udpTransport, _ = await loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(self), local_addr=(self.host, self.udpPort))
+            self.udpAddress = self._udpTransport.get_extra_info("sockname")
+        if self.tcpPort is not None:
+            self._tcpServer = await asyncio.start_server(self._handleConnection, self.host, self.tcpPort)
+            self.tcpAddress = self._tcpServer.sockets[0].getsockname()
+
+    async def stop(self):
+        """
+        Stops listening, processes what is already queued and cancels the
+        consumers. Batches left in plain subscriber queues stay there.
+        """
+        if self._udpTransport is not None:
+            self._udpTransport.close()
+        if self._tcpServer is not None:
+            self._tcpServer.close()
+            await self._tcpServer.wait_closed()
+        if self._inbound is not None:
+            await self._inbound.join()
+        for queue in self._callbackQueues:
+            await queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _handleConnection(self, reader, writer):
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                textLines, binaryRecords, buffer = _decodeRecords(buffer + data)
+                if textLines or binaryRecords:
+                    # Waits while the inbound queue is full, which stops reading this socket
+                    await self._inbound.put((textLines, binaryRecords))
+        finally:
+            writer.close()
+
+    def _solveBatch(self, textLines, binaryRecords):
+        tagIds, distances = self.parser.parseBlock("\n".join(textLines))
+        if binaryRecords:
+            binaryDistances = np.full((len(binaryRecords), len(self.anchors)), np.nan)
+            binaryTagIds = np.empty(len(binaryRecords), dtype=np.int32)
+            for i, (tagName, values) in enumerate(binaryRecords):
+                binaryTagIds[i] = self.parser.tagId(tagName)
+                count = min(len(values), len(self.anchors))
+                binaryDistances[i, :count] = values[:count]
+            tagIds = np.concatenate((tagIds, binaryTagIds))
+            distances = np.concatenate((distances, binaryDistances))
+        if self._solver is None:
+            positions, valid = trilateration_2d_batch(distances, self._terms)
+        else:
+            positions, _, valid = self._solver.solve(distances)
+        return positions[valid], tagIds[valid]
+
+    async def _batcher(self):
+        while True:
+            textLines, binaryRecords = await self._inbound.get()
+            textLines, binaryRecords = list(textLines), list(binaryRecords)
+            taken = 1
+            # Take whatever else is already waiting, up to batchSize records
+            while len(textLines) + len(binaryRecords) < self.batchSize and not self._inbound.empty():
+                moreText, moreBinary = self._inbound.get_nowait()
+                textLines.extend(moreText)
+                binaryRecords.extend(moreBinary)
+                taken += 1
+            try:
+                self.receivedRecords += len(textLines) + len(binaryRecords)
+                positions, tagIds = self._solveBatch(textLines, binaryRecords)
+                if len(positions) > 0:
+                    self.publishedPositions += len(positions)
+                    for queue in self._subscribers:
+                        await queue.put((positions, tagIds, self.parser.tagNames))
+            except Exception:
+                self.failedBatches += 1
+                _log.exception("Batch of %d records failed, dropped", len(textLines) + len(binaryRecords))
+            finally:
+                for _ in range(taken):
+                    self._inbound.task_done()
+
+if __name__ == "__main__":
+    # Local load test: sends the sample log over TCP (text) and UDP (binary frames)
+    import ast
+    import socket
+
+    anchors_2d = [
+        (0.1, 0.1),    # Anchor1
+        (0.1, 42.8),   # Anchor2
+        (59.0, 0.1)    # Anchor3
+    ]
+    sampleFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TStransporter.txt")
+    with open(sampleFile, "rb") as f:
+        lines = [line for line in f.read().splitlines(True) if line.strip()]
+
+    async def loadTest(repeat=20):
+        server = IngestionServer(anchors_2d, udpPort=0, tcpPort=0)
+        received = []
+        server.subscribe(lambda positions, tagIds, tagNames: received.append(len(positions)))
+        await server.start()
+
+        start = time.time()
+        reader, writer = await asyncio.open_connection(*server.tcpAddress)
+        for _ in range(repeat):
+            writer.write(b"".join(lines))
+            await writer.drain()
+        writer.close()
+
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for line in lines:
+            row = ast.literal_eval(line.decode())
+            udp.sendto(encodeBinaryRecord(row["TagName"], [row["Anchor1"], row["Anchor2"], row["Anchor3"]]), server.udpAddress)
+            await asyncio.sleep(0)
+        udp.close()
+
+        await asyncio.sleep(0.2)
+        await server.stop()
+        elapsed = time.time() - start
+        print("Records:", server.receivedRecords, "Positions:", sum(received),
+              "Dropped datagrams:", server.droppedDatagrams,
+              "Fixes/s: %.0f" % (server.publishedPositions / elapsed))
+
+    asyncio.run(loadTest())
@@ -0,0 +1,122 @@
+import os
+import multiprocessing
+import numpy as np
+
+from .DistanceLogReader import DistanceLogParser
+from .trilateration import precompute_anchor_terms, trilateration_2d_batch, LeastSquaresTrilateration, splitPositionsByTag
+from .ResourceUtilization import pointsFromCSVLines, transformPointChunkFromAnyLogicSimulation
+
+__all__ = ["ingestFiles", "splitAtLineBoundaries"]
+
+def splitAtLineBoundaries(filepath, rangeSize, skipHeader=False):
+    """
+    Splits a file into byte ranges of about 'rangeSize' bytes that start and
+    end on line boundaries. With skipHeader the first line is left out.
+    Returns a list of (start, end) offsets.
+    """
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, "rb") as f:
+        start = 0
+        if skipHeader:
+            f.readline()
+            start = f.tell()
+        while start < size:
+            f.seek(min(start + rangeSize, size))
+            if f.tell() < size:
+                f.readline()  # move to the start of the next line
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _readRange(filepath, start, end):
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8")
+
+def _ingestDistanceRange(task):
+    """Worker: parses and trilaterates one byte range of a distance log."""
+    filepath, start, end, anchors = task
+    parser = DistanceLogParser(anchorCount=len(anchors))
+    tagIds, distances = parser.parseBlock(_readRange(filepath, start, end))
+    if len(anchors) == 3:
+        positions, valid = trilateration_2d_batch(distances, precompute_anchor_terms(anchors))
+    else:
+        positions, _, valid = LeastSquaresTrilateration(anchors).solve(distances)
+    return parser.tagNames, tagIds[valid], positions[valid]
+
+def _ingestCSVRange(task):
+    """Worker: reads the points of one byte range of a CSV export."""
+    filepath, start, end, anyLogicOrigin = task
+    points = pointsFromCSVLines(_readRange(filepath, start, end).splitlines())
+    if anyLogicOrigin is not None:
+        points = transformPointChunkFromAnyLogicSimulation(points, *anyLogicOrigin)
+    return points
+
+def _runTask(task):
+    worker, args = task
+    return worker(args)
+
+def _mergeDistanceRanges(results, perTag):
+    """Joins the range results of one distance log, remapping the per-range tag ids."""
+    tagNames = []
+    tagIndex = {}
+    tagIds = []
+    positions = []
+    for rangeTagNames, rangeTagIds, rangePositions in results:
+        lookup = np.empty(max(len(rangeTagNames), 1), dtype=np.int32)
+        for i, tagName in enumerate(rangeTagNames):
+            if tagName not in tagIndex:
+                tagIndex[tagName] = len(tagNames)
+                tagNames.append(tagName)
+            lookup[i] = tagIndex[tagName]
+        tagIds.append(lookup[rangeTagIds])
+        positions.append(rangePositions)
+    tagIds = np.concatenate(tagIds) if tagIds else np.empty(0, dtype=np.int32)
+    positions = np.concatenate(positions) if positions else np.empty((0, 2))
+    if perTag:
+        return splitPositionsByTag(tagIds, positions, np.ones(len(tagIds), dtype=bool), tagNames)
+    return positions
+
+def ingestFiles(paths, anchors=None, processes=None, rangeSize=32 << 20, perTag=False, anyLogicOrigin=None):
+    """
+    Parses a list of captures on a process pool and returns one result per
+    path, in the order of 'paths'.
+      - .csv files are AnyLogic exports, the result is the (M, 2) array of their
+        points (moved to the image origin if anyLogicOrigin=(x0, y0) is given).
+      - any other file is a distance log trilaterated with 'anchors', the
+        result is the (M, 2) array of valid positions, or {tagName: array}
+        with perTag.
+    Big files are split at line boundaries into ranges of about 'rangeSize'
+    bytes, so a single large capture is spread over the pool as well.
+    """
+    tasks = []
+    owners = []
+    for fileIndex, path in enumerate(paths):
+        isCSV = path.lower().endswith(".csv")
+        for start, end in splitAtLineBoundaries(path, rangeSize, skipHeader=isCSV):
+            if isCSV:
+                tasks.append((_ingestCSVRange, (path, start, end, anyLogicOrigin)))
+            else:
+                tasks.append((_ingestDistanceRange, (path, start, end, list(anchors))))
+            owners.append(fileIndex)
+
+    if processes == 1 or len(tasks) <= 1:
+        results = [_runTask(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            # imap keeps the order of the tasks
+            results = list(pool.imap(_runTask, tasks))
+
+    perFile = [[] for _ in paths]
+    for fileIndex, result in zip(owners, results):
+        perFile[fileIndex].append(result)
+
+    output = []
+    for path, fileResults in zip(paths, perFile):
+        if path.lower().endswith(".csv"):
+            output.append(np.concatenate(fileResults) if fileResults else np.empty((0, 2)))
+        else:
+            output.append(_mergeDistanceRanges(fileResults, perTag))
+    return output
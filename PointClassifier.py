@@ -1,91 +1,304 @@
-import math
-__all__ = ["classify_points_latest_only"]
-
-def euclidean_distance(p1, p2):
-    """Return the Euclidean distance between two points p1=(x1,y1), p2=(x2,y2)."""
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-def drop_clusters_with_low_number_of_points(clusters, minLength):
-    newClusters = []
-    for i,cls in enumerate(clusters):
-        if len(cls["points"]) >= minLength:
-            newClusters.append(cls)
-    return newClusters
-def classify_points_latest_only(points, threshold):
-    """
-    Clusters (x,y) points by checking each new point only against
-    the most recently created cluster.
-    
-    Algorithm:
-    1. First point → first cluster (center = that point).
-    2. For each subsequent point:
-       - Compare distance to the center of the 'latest' cluster only.
-       - If distance < threshold, add point to that cluster and update center.
-       - Otherwise, create a new cluster with this point as its center.
-
-    Returns a list of clusters, each cluster being a dict with:
-        {
-          "center": (cx, cy),
-          "points": [(x1, y1), (x2, y2), ...]
-        }
-    """
-    if not points:
-        return []
-
-    # Initialize the first cluster with the first point
-    clusters = [{
-        "center": points[0],
-        "points": [points[0]]
-    }]
-
-    def update_center(cluster):
-        xs = [pt[0] for pt in cluster["points"]]
-        ys = [pt[1] for pt in cluster["points"]]
-        # New center is the average of x and y coordinates
-        cluster["center"] = (sum(xs)/len(xs), sum(ys)/len(ys))
-
-    # Go through the rest of the points
-    for point in points[1:]:
-        # Always compare with the 'latest' (most recently created) cluster
-        latest_cluster = clusters[-1]
-        dist = euclidean_distance(point, latest_cluster["center"])
-
-        if dist < threshold:
-            # Add this point to the latest cluster
-            latest_cluster["points"].append(point)
-            update_center(latest_cluster)
-        else:
-            # Create a brand new cluster
-            new_cluster = {
-                "center": point,
-                "points": [point]
-            }
-            clusters.append(new_cluster)
-
-    return clusters
-
-if __name__ == "__main__":
-    # Example usage:
-    data_points = [
-        (1, 2), (2, 2), (5, 5), (5, 6),(5, 6),(5, 6),(5, 6), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9),
-        (10, 10),(10, 10),(10, 10),(10, 10), (11, 12), (9, 9), (2, 3), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9), 
-        (5, 6),(5, 6),(5, 6),(5, 6), (5, 6),(5, 6),(5, 6),(5, 6), (1,2), (1,2), (1,2), (1,2), (1,2), (1,2), (5, 6),(5, 6),(5, 6),(5, 6), (1,2), (1,2), (1,2), (1,2), (1,2)
-    ]
-    distance_threshold = 2.0
-
-    results = classify_points_latest_only(data_points, distance_threshold)
-    results = drop_clusters_with_low_number_of_points(results, 4)
-    clusters = {  }
-
-    for i, cluster in enumerate(results):
-        temp_dict = { "id": i+1,
-            "center": cluster['center'],
-            "points": cluster['points'],
-            "flow_to": [i+2]}
-        if (i+1) == len(results) :
-            temp_dict["flow_to"] = []
-        clusters[i+1] = temp_dict
-        print(f"Cluster {i+1}:")
-        print(f"  Center: {cluster['center']}")
-        print(f"  Points: {cluster['points']}")
-        print()
+import math
+from collections import OrderedDict
+import numpy as np
+try:
+    # Optional: compiles the segmentation kernel, a pure Python loop is used without it
+    from numba import njit
+except ImportError:
+    njit = None
+__all__ = ["classify_points_latest_only", "LatestOnlyStreamClassifier", "segment_points_latest_only", "ThresholdSweep"]
+
+def euclidean_distance(p1, p2):
+    """Return the Euclidean distance between two points p1=(x1,y1), p2=(x2,y2)."""
+    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+def drop_clusters_with_low_number_of_points(clusters, minLength):
+    newClusters = []
+    for i,cls in enumerate(clusters):
+        if len(cls["points"]) >= minLength:
+            newClusters.append(cls)
+    return newClusters
+def classify_points_latest_only(points, threshold):
+    """
+    Clusters (x,y) points by checking each new point only against
+    the most recently created cluster.
+    
+    Algorithm:
+    1. First point → first cluster (center = that point).
+    2. For each subsequent point:
+       - Compare distance to the center of the 'latest' cluster only.
+       - If distance < threshold, add point to that cluster and update center.
+       - Otherwise, create a new cluster with this point as its center.
+
+    Returns a list of clusters, each cluster being a dict with:
+        {
+          "center": (cx, cy),
+          "points": [(x1, y1), (x2, y2), ...]
+        }
+    """
+    if isinstance(points, np.ndarray):
+        # e.g. one tag's track from calculatePositionsPerTag
+        points = [tuple(p) for p in points.tolist()]
+    if not points:
+        return []
+
+    # Initialize the first cluster with the first point
+    clusters = [{
+        "center": points[0],
+        "points": [points[0]]
+    }]
+    # Running coordinate sums of the latest cluster, so updating its center
+    # doesn't walk over all of its points again
+    sum_x, sum_y = points[0][0], points[0][1]
+
+    # Go through the rest of the points
+    for point in points[1:]:
+        # Always compare with the 'latest' (most recently created) cluster
+        latest_cluster = clusters[-1]
+        dist = euclidean_distance(point, latest_cluster["center"])
+
+        if dist < threshold:
+            # Add this point to the latest cluster
+            latest_cluster["points"].append(point)
+            sum_x += point[0]
+            sum_y += point[1]
+            n = len(latest_cluster["points"])
+            # New center is the average of x and y coordinates
+            latest_cluster["center"] = (sum_x/n, sum_y/n)
+        else:
+            # Create a brand new cluster
+            new_cluster = {
+                "center": point,
+                "points": [point]
+            }
+            clusters.append(new_cluster)
+            sum_x, sum_y = point[0], point[1]
+
+    return clusters
+
+def _segment_latest_only(xs, ys, threshold, min_length, starts, lengths, centers):
+    """
+    Kernel of segment_points_latest_only. Fills the preallocated output
+    arrays with the segments of at least 'min_length' points and returns
+    how many there are. Same arithmetic as classify_points_latest_only.
+    """
+    n = len(xs)
+    if n == 0:
+        return 0
+    k = 0
+    start = 0
+    count = 1
+    sum_x = xs[0]
+    sum_y = ys[0]
+    cx = sum_x
+    cy = sum_y
+    for i in range(1, n):
+        x = xs[i]
+        y = ys[i]
+        dx = x - cx
+        dy = y - cy
+        if math.sqrt(dx*dx + dy*dy) < threshold:
+            sum_x += x
+            sum_y += y
+            count += 1
+            cx = sum_x/count
+            cy = sum_y/count
+        else:
+            if count >= min_length:
+                starts[k] = start
+                lengths[k] = count
+                centers[k, 0] = cx
+                centers[k, 1] = cy
+                k += 1
+            start = i
+            count = 1
+            sum_x = x
+            sum_y = y
+            cx = x
+            cy = y
+    if count >= min_length:
+        starts[k] = start
+        lengths[k] = count
+        centers[k, 0] = cx
+        centers[k, 1] = cy
+        k += 1
+    return k
+
+_segment_kernel = njit(cache=True, nogil=True)(_segment_latest_only) if njit is not None else None
+
+def segment_points_latest_only(points, threshold, min_length=1):
+    """
+    Array version of classify_points_latest_only followed by
+    drop_clusters_with_low_number_of_points(clusters, min_length).
+    The track is cut into segments in one sequential pass over an (N, 2)
+    array and only the segments with at least 'min_length' points are kept.
+
+    Returns (starts, lengths, centers): the index of the first point and the
+    number of points of every kept segment, and its (K, 2) centroids. The
+    centers are identical to the ones of classify_points_latest_only.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    min_length = max(int(min_length), 1)
+    # Every kept segment has at least min_length points, which bounds their number
+    capacity = len(points)//min_length + 1
+    starts = np.empty(capacity, dtype=np.int64)
+    lengths = np.empty(capacity, dtype=np.int64)
+    centers = np.empty((capacity, 2))
+    if _segment_kernel is not None:
+        xs = np.ascontiguousarray(points[:, 0])
+        ys = np.ascontiguousarray(points[:, 1])
+        k = _segment_kernel(xs, ys, float(threshold), min_length, starts, lengths, centers)
+    else:
+        # Python floats are much faster to loop over than numpy scalars
+        k = _segment_latest_only(points[:, 0].tolist(), points[:, 1].tolist(), threshold, min_length, starts, lengths, centers)
+    return starts[:k].copy(), lengths[:k].copy(), centers[:k].copy()
+
+class ThresholdSweep:
+    """
+    Segmentations of one track for many clustering thresholds, e.g. the
+    values of the point clustering slider (0.0 - 9.9 m in 0.1 steps).
+    Each threshold is segmented once, with min_length=1, and cached; the
+    minimum points filter is applied on the cached arrays, so changing
+    either value afterwards is a lookup.
+
+    The cache keeps the least recently used thresholds within 'max_bytes'
+    (nbytes reports the current use).
+    """
+    def __init__(self, points, max_bytes=256 << 20):
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def slider_grid(steps=100, step=0.1):
+        """Thresholds of the point clustering slider: 0.0, 0.1, ... 9.9"""
+        return [round(i*step, 10) for i in range(steps)]
+
+    def _segments(self, threshold):
+        key = round(float(threshold), 10)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        result = segment_points_latest_only(self.points, key)
+        self._cache[key] = result
+        self.nbytes += sum(a.nbytes for a in result)
+        while self.nbytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self.nbytes -= sum(a.nbytes for a in evicted)
+        return result
+
+    def segments(self, threshold, min_length=1):
+        """Same as segment_points_latest_only(points, threshold, min_length), from the cache."""
+        starts, lengths, centers = self._segments(threshold)
+        if min_length <= 1:
+            return starts, lengths, centers
+        keep = lengths >= min_length
+        return starts[keep], lengths[keep], centers[keep]
+
+    def precompute(self, thresholds=None):
+        """Fills the cache for 'thresholds' (the slider grid by default) as far as max_bytes allows."""
+        for threshold in (thresholds if thresholds is not None else self.slider_grid()):
+            self._segments(threshold)
+        return self.nbytes
+
+class LatestOnlyStreamClassifier:
+    """
+    Streaming version of classify_points_latest_only for live feeds.
+    Points are given one by one (add) or in chunks (add_chunk). Only the
+    open (latest) cluster is kept, as a running sum and count, so every
+    point costs O(1) and memory doesn't grow with the length of a dwell.
+
+    As soon as a point falls outside the open cluster, that cluster is
+    closed and returned (and passed to 'on_closed' if given) as:
+        {
+          "center": (cx, cy),
+          "sum": (sx, sy),
+          "count": n,
+          "start": index of its first point in the stream,
+          "points": [...]   # only with keep_points=True
+        }
+    Clusters with fewer than 'min_length' points are dropped, like
+    drop_clusters_with_low_number_of_points. Call flush() at the end of the
+    stream to close the last cluster.
+    """
+    def __init__(self, threshold, min_length=1, keep_points=False, on_closed=None):
+        self.threshold = threshold
+        self.min_length = min_length
+        self.keep_points = keep_points
+        self.on_closed = on_closed
+        self.index = 0
+        self._open = None
+
+    def _close(self):
+        cluster = self._open
+        self._open = None
+        if cluster is None or cluster["count"] < self.min_length:
+            return None
+        if self.on_closed is not None:
+            self.on_closed(cluster)
+        return cluster
+
+    def add(self, point):
+        """Adds one point, returns the list of clusters closed by it (empty or one cluster)."""
+        point = (point[0], point[1])
+        closed = []
+        cluster = self._open
+        if cluster is not None and euclidean_distance(point, cluster["center"]) < self.threshold:
+            sum_x = cluster["sum"][0] + point[0]
+            sum_y = cluster["sum"][1] + point[1]
+            cluster["count"] += 1
+            cluster["sum"] = (sum_x, sum_y)
+            cluster["center"] = (sum_x/cluster["count"], sum_y/cluster["count"])
+            if self.keep_points:
+                cluster["points"].append(point)
+        else:
+            if cluster is not None:
+                closed_cluster = self._close()
+                if closed_cluster is not None:
+                    closed.append(closed_cluster)
+            self._open = {"center": point, "sum": point, "count": 1, "start": self.index}
+            if self.keep_points:
+                self._open["points"] = [point]
+        self.index += 1
+        return closed
+
+    def add_chunk(self, points):
+        """Adds a chunk of points (list of tuples or (N, 2) array), returns the clusters it closed."""
+        if isinstance(points, np.ndarray):
+            points = points.tolist()
+        closed = []
+        for point in points:
+            closed.extend(self.add(point))
+        return closed
+
+    def flush(self):
+        """Closes the open cluster at the end of the stream, returns it in a list (or an empty list)."""
+        cluster = self._close()
+        return [cluster] if cluster is not None else []
+
+if __name__ == "__main__":
+    # Example usage:
+    data_points = [
+        (1, 2), (2, 2), (5, 5), (5, 6),(5, 6),(5, 6),(5, 6), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9),
+        (10, 10),(10, 10),(10, 10),(10, 10), (11, 12), (9, 9), (2, 3), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9), (2.2, 2.9), 
+        (5, 6),(5, 6),(5, 6),(5, 6), (5, 6),(5, 6),(5, 6),(5, 6), (1,2), (1,2), (1,2), (1,2), (1,2), (1,2), (5, 6),(5, 6),(5, 6),(5, 6), (1,2), (1,2), (1,2), (1,2), (1,2)
+    ]
+    distance_threshold = 2.0
+
+    results = classify_points_latest_only(data_points, distance_threshold)
+    results = drop_clusters_with_low_number_of_points(results, 4)
+    clusters = {  }
+
+    for i, cluster in enumerate(results):
+        temp_dict = { "id": i+1,
+            "center": cluster['center'],
+            "points": cluster['points'],
+            "flow_to": [i+2]}
+        if (i+1) == len(results) :
+            temp_dict["flow_to"] = []
+        clusters[i+1] = temp_dict
+        print(f"Cluster {i+1}:")
+        print(f"  Center: {cluster['center']}")
+        print(f"  Points: {cluster['points']}")
+        print()
     print(clusters)
\ No newline at end of file
@@ -1,181 +1,545 @@
-from .ClusterMerger import plot_clusters_with_flow, merge_all_within_threshold, classesToClusterDictionary
-from .PointClassifier import classify_points_latest_only, drop_clusters_with_low_number_of_points
-from .trilateration import calculateListOfPoints
-from PIL import Image
-import sys
-import math
-import copy
-import csv
-
-import matplotlib.ticker as ticker
-import matplotlib.pyplot as plt
-from collections import Counter
-
-class Area:
-    def __init__(self, name, point1, point2):
-        self.name = name
-        # Normalize the rectangle (ensure point1 is bottom-left, point2 is top-right)
-        self.x_min = min(point1[0], point2[0])
-        self.x_max = max(point1[0], point2[0])
-        self.y_min = min(point1[1], point2[1])
-        self.y_max = max(point1[1], point2[1])
-
-    def contains(self, point):
-        x, y = point
-        return self.x_min <= x <= self.x_max and self.y_min <= y <= self.y_max
-
-def find_area_for_point(point, areas):
-    for area in areas:
-        if area.contains(point):
-            return area.name
-    return "Moving"
-def readPointsFromCSV(filename):
-    xyPoints = []
-    with open(filename, 'r') as f:
-        reader = csv.reader(f)
-        
-        # If your CSVs have headers like "x,y", uncomment the next line:
-        # next(reader, None)  # skip header row
-        next(reader, None)
-
-        for row in reader:
-            # Each row is expected to have two columns: x, y
-            if len(row) < 2:
-                continue
-            x_val, y_val = float(row[0]), float(row[1])
-            xyPoints.append((x_val,y_val))
-    return xyPoints
-def transformPointDataFromAnyLogicSimulation(points , imageXzero = 35 , imageYzero = 36 , inverseY = True):
-    newPoints = []
-    if points != None:
-        for i in range(0,len(points)):
-            newX = points[i][0]- imageXzero
-            newY = imageYzero - points[i][1]
-            newPoints.append((newX, newY))
-    return newPoints
-def seconds_to_hm(seconds):
-    h = seconds // 3600
-    m = (seconds % 3600) // 60
-    if h > 0:
-        return f"{h}h:{m}m"
-    elif m > 0:
-        return f"{m}m"
-    else:
-        return f"{seconds}s"
-def summarize_states(states, interval_seconds):
-    if not states:
-        return []
-
-    result = []
-    current_state = states[0]
-    start_index = 0
-
-    for i in range(1, len(states)):
-        if states[i] != current_state:
-            result.append((start_index * interval_seconds, current_state))
-            current_state = states[i]
-            start_index = i
-
-    # Append the last state
-    result.append((start_index * interval_seconds, current_state))
-    return result
-def state_to_numeric(states):
-    unique_states = sorted(set(state for _, state in states))
-    state_map = {state: i for i, state in enumerate(unique_states)}
-    numeric_states = [(t, state_map[state]) for t, state in states]
-    return numeric_states, state_map
-
-def plot_step_states(states_summary):
-    numeric_states, state_map = state_to_numeric(states_summary)
-
-    times = [t for t, _ in numeric_states]
-    values = [v for _, v in numeric_states]
-
-    if len(times) > 1:
-        end_time = (times[-1] + (times[-1] - times[-2]))
-    else:
-        end_time = times[-1] + 1
-    times.append(end_time)
-    values.append(values[-1])
-
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.step(times, values, where='post', linewidth=2)
-
-    ax.set_yticks(list(state_map.values()))
-    ax.set_yticklabels(list(state_map.keys()))
-    ax.set_ylabel("State")
-    ax.set_xlabel("Time")
-
-    # Format x-axis labels as hours and minutes
-    def time_formatter(x, pos):
-        return seconds_to_hm(int(x))
-
-    ax.xaxis.set_major_formatter(ticker.FuncFormatter(time_formatter))
-    ax.set_title("State Transitions Over Time")
-    ax.grid(True)
-    plt.tight_layout()
-    plt.show()
-def calculateUtilization( states, idleStateName = "IDLE"):
-    print( "Utilization:", 1 - states.count(idleStateName)/len(states))
-def utilizationGraph(states, sumPeriod = 3600, idleStateName = "IDLE"):
-    avgUtil = []
-    xAxisValues = []
-    for i in range (sumPeriod, len(states), sumPeriod):
-        sum = 0
-        end = min(i, len(states))
-        for j in range(0, end):
-            if (states[j] == idleStateName):
-                sum = sum + 1
-        avgUtil.append(1 - sum/end)
-        xAxisValues.append(seconds_to_hm(i))
-    return avgUtil, xAxisValues, Counter(states)
-def main():
-    # Example setup:
-    areas_data = [
-        ("Output Racks", (18, 16), (38, 23)),
-        ("Input Racks", (18, 2), (38, 9)),
-        ("Unloading Truck", (1, 5), (7, 13)),
-        ("Loading Truck", (1, 17), (7, 23)),
-        ("IDLE", (37, 9), (42, 16)),
-        ("Machine", (45, 5), (50, 20))
-    ]
-    
-    input_file = "C:\\Users\\thano\\OneDrive - Αριστοτέλειο Πανεπιστήμιο Θεσσαλονίκης\\PhD Dissertation\\Job Shop1 with Positioning Data\\population3.csv"
-    
-    points = readPointsFromCSV(input_file)
-    points = transformPointDataFromAnyLogicSimulation(points, imageXzero=35, imageYzero=36)
-
-    # Create Area objects
-    areas = [Area(name, p1, p2) for name, p1, p2 in areas_data]
-
-    # Process points
-    x = []
-    y = []
-    for idx, point in enumerate(points):
-        area_name = find_area_for_point(point, areas)
-        print(f"Point {idx} at {point} is in area: {area_name}")
-        x.append(idx)
-        y.append(area_name)
-
-    calculateUtilization(y)
-    stateTransitions = summarize_states(y, 1)
-    utilValues, xValues, counterList = utilizationGraph(y, sumPeriod = 60)
-    print(counterList)
-    plot_step_states(stateTransitions)
-    
-    fig, ax = plt.subplots()
-    ax.plot(range(len(xValues)), utilValues, marker='o', linestyle='-', color='b')  # Plot using integer indices
-
-    # Set x-ticks at every 100th position
-    ax.set_xticks(range(0, len(xValues), 20))
-    ax.set_xticklabels(xValues[::20], rotation=45, ha='right')
-
-    ax.set_title('Forklift Utilization')
-    ax.set_xlabel('Time')
-    ax.set_ylabel('Overall Utilization')
-    ax.grid(True)
-    plt.tight_layout()
-    plt.show()
-
-if __name__ == "__main__":
+from .ClusterMerger import plot_clusters_with_flow, merge_all_within_threshold, classesToClusterDictionary
+from .PointClassifier import classify_points_latest_only, drop_clusters_with_low_number_of_points
+from .trilateration import calculateListOfPoints
+from PIL import Image
+import sys
+import math
+import copy
+import csv
+import json
+import itertools
+import numpy as np
+
+import matplotlib.ticker as ticker
+import matplotlib.pyplot as plt
+from collections import Counter
+
+class Area:
+    def __init__(self, name, point1, point2):
+        self.name = name
+        # Normalize the rectangle (ensure point1 is bottom-left, point2 is top-right)
+        self.x_min = min(point1[0], point2[0])
+        self.x_max = max(point1[0], point2[0])
+        self.y_min = min(point1[1], point2[1])
+        self.y_max = max(point1[1], point2[1])
+
+    def contains(self, point):
+        x, y = point
+        return self.x_min <= x <= self.x_max and self.y_min <= y <= self.y_max
+
+    def contains_points(self, points):
+        """Vectorized contains() for an (N, 2) array, returns a boolean mask."""
+        return (points[:, 0] >= self.x_min) & (points[:, 0] <= self.x_max) & (points[:, 1] >= self.y_min) & (points[:, 1] <= self.y_max)
+
+class PolygonArea:
+    """
+    Area with a polygon outline, for zones that aren't axis-aligned
+    rectangles. Points on the outline count as inside, like for Area.
+    x_min/x_max/y_min/y_max are its bounding box.
+    """
+    def __init__(self, name, vertices):
+        self.name = name
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        if len(self.vertices) < 3:
+            raise ValueError(f"Polygon area '{name}' needs at least 3 vertices")
+        self.x_min, self.y_min = self.vertices.min(axis=0).tolist()
+        self.x_max, self.y_max = self.vertices.max(axis=0).tolist()
+
+    def contains(self, point):
+        return bool(self.contains_points(np.array([point], dtype=np.float64))[0])
+
+    def contains_points(self, points):
+        """Even-odd point in polygon test of an (N, 2) array, one vectorized step per edge."""
+        px = points[:, 0]
+        py = points[:, 1]
+        inside = np.zeros(len(points), dtype=bool)
+        onEdge = np.zeros(len(points), dtype=bool)
+        for (x1, y1), (x2, y2) in zip(self.vertices, np.roll(self.vertices, -1, axis=0)):
+            crosses = (y1 > py) != (y2 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xCross = x1 + (py - y1)*(x2 - x1)/(y2 - y1)
+            inside ^= crosses & (px < xCross)
+            onEdge |= (((x2 - x1)*(py - y1) - (y2 - y1)*(px - x1)) == 0) & \
+                      (px >= min(x1, x2)) & (px <= max(x1, x2)) & (py >= min(y1, y2)) & (py <= max(y1, y2))
+        return inside | onEdge
+
+def loadZones(filename):
+    """
+    Reads zones from a JSON config file, in priority order (first match
+    wins, like the Area list):
+        {"zones": [
+            {"name": "IDLE", "rect": [[37, 9], [42, 16]]},
+            {"name": "Aisle 1", "polygon": [[18, 9], [38, 9], [40, 12], [18, 12]]}
+        ]}
+    "rect" zones become Area objects, "polygon" zones PolygonArea objects.
+    """
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    zones = []
+    for entry in config.get("zones", []):
+        if "polygon" in entry:
+            zones.append(PolygonArea(entry["name"], entry["polygon"]))
+        elif "rect" in entry:
+            zones.append(Area(entry["name"], *entry["rect"]))
+        else:
+            raise ValueError(f"Zone '{entry.get('name')}' has neither a 'rect' nor a 'polygon'")
+    return zones
+
+def find_area_for_point(point, areas):
+    for area in areas:
+        if area.contains(point):
+            return area.name
+    return "Moving"
+class AreaLabeler:
+    """
+    Labels whole position arrays with the Area list, giving the same answer
+    as find_area_for_point (the first area that contains a point wins).
+
+    The areas are compiled once into a label grid with cells of
+    'resolution' meters. Cells that lie fully inside their first area, or
+    outside all of them, answer straight from the grid; cells crossed by an
+    area border (and their neighbours, so rounding of the cell index can't
+    matter) are marked ambiguous and their points are checked exactly
+    against the areas.
+
+    Codes are integers: 0 is "Moving" (no area), k + 1 is areas[k]; names[code] gives the name.
+    """
+    MOVING = 0
+
+    def __init__(self, areas, resolution = 0.1, movingName = "Moving"):
+        self.areas = list(areas)
+        self.resolution = resolution
+        self.names = [movingName] + [area.name for area in self.areas]
+        self.bounds = np.array([(a.x_min, a.x_max, a.y_min, a.y_max) for a in self.areas], dtype=np.float64).reshape(-1, 4)
+        if not self.areas:
+            self.grid = np.zeros((0, 0), dtype=np.int32)
+            self.ambiguous = np.zeros((0, 0), dtype=bool)
+            self.origin = (0.0, 0.0)
+            return
+
+        # One spare cell around all the areas, so points off the grid are in no area
+        x0 = self.bounds[:, 0].min() - resolution
+        y0 = self.bounds[:, 2].min() - resolution
+        nx = int(math.ceil((self.bounds[:, 1].max() - x0)/resolution)) + 2
+        ny = int(math.ceil((self.bounds[:, 3].max() - y0)/resolution)) + 2
+        self.origin = (x0, y0)
+        edgesX = x0 + resolution*np.arange(nx + 1)
+        edgesY = y0 + resolution*np.arange(ny + 1)
+
+        grid = np.zeros((nx, ny), dtype=np.int32)
+        ambiguous = np.zeros((nx, ny), dtype=bool)
+        # Last area first, so the areas earlier in the list paint over it
+        for k in range(len(self.areas) - 1, -1, -1):
+            xMin, xMax, yMin, yMax = self.bounds[k]
+            fullX = (edgesX[:-1] >= xMin) & (edgesX[1:] <= xMax)
+            fullY = (edgesY[:-1] >= yMin) & (edgesY[1:] <= yMax)
+            # Closed test, a border lying on a cell edge marks the cells on both sides
+            touchX = (edgesX[:-1] <= xMax) & (edgesX[1:] >= xMin)
+            touchY = (edgesY[:-1] <= yMax) & (edgesY[1:] >= yMin)
+            full = np.outer(fullX, fullY)
+            grid[full] = k + 1
+            ambiguous[full] = False
+            ambiguous |= np.outer(touchX, touchY) & ~full
+
+        # Spread the ambiguous cells by one cell in every direction
+        padded = np.pad(ambiguous, 1)
+        self.ambiguous = np.zeros_like(ambiguous)
+        for dx in (0, 1, 2):
+            for dy in (0, 1, 2):
+                self.ambiguous |= padded[dx:dx + nx, dy:dy + ny]
+        self.grid = grid
+
+    def _label_exact(self, points):
+        """First-match labeling of a few points, one vectorized test per area."""
+        codes = np.zeros(len(points), dtype=np.int32)
+        open_ = np.ones(len(points), dtype=bool)
+        for k, (xMin, xMax, yMin, yMax) in enumerate(self.bounds):
+            inside = open_ & (points[:, 0] >= xMin) & (points[:, 0] <= xMax) & (points[:, 1] >= yMin) & (points[:, 1] <= yMax)
+            codes[inside] = k + 1
+            open_ &= ~inside
+        return codes
+
+    def label_points(self, points):
+        """Integer area codes (N,) of an (N, 2) position array."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        codes = np.zeros(len(points), dtype=np.int32)
+        if self.grid.size == 0:
+            return codes
+        nx, ny = self.grid.shape
+        ix = np.floor((points[:, 0] - self.origin[0])/self.resolution)
+        iy = np.floor((points[:, 1] - self.origin[1])/self.resolution)
+        # NaN positions compare False here and stay "Moving"
+        onGrid = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        where = np.flatnonzero(onGrid)
+        ix = ix[where].astype(np.intp)
+        iy = iy[where].astype(np.intp)
+        codes[where] = self.grid[ix, iy]
+
+        exact = where[self.ambiguous[ix, iy]]
+        codes[exact] = self._label_exact(points[exact])
+        return codes
+
+    def label_names(self, points):
+        """Area names of an (N, 2) position array, like find_area_for_point for every point."""
+        return np.array(self.names, dtype=object)[self.label_points(points)].tolist()
+class ZoneIndex:
+    """
+    Labels position arrays with a list of zones (Area and PolygonArea
+    objects), first match wins like find_area_for_point.
+
+    The zones' bounding boxes are bucketed on a uniform grid of 'cellSize'
+    meters. Points are sorted by grid cell once, then every zone only tests
+    the still unlabeled points in the cells its bounding box covers, with
+    its vectorized contains_points(). The work per point depends on how
+    many zones overlap around it, not on the size of the site.
+
+    Codes are integers: 0 is "Moving" (no zone), k + 1 is zones[k]; names[code] gives the name.
+    """
+    MOVING = 0
+
+    def __init__(self, zones, cellSize = None, movingName = "Moving"):
+        self.zones = list(zones)
+        self.names = [movingName] + [zone.name for zone in self.zones]
+        bounds = np.array([(z.x_min, z.x_max, z.y_min, z.y_max) for z in self.zones], dtype=np.float64).reshape(-1, 4)
+        if cellSize is None:
+            # About the size of a typical zone
+            sizes = np.maximum(bounds[:, 1] - bounds[:, 0], bounds[:, 3] - bounds[:, 2])
+            cellSize = float(np.median(sizes)) if len(sizes) and np.median(sizes) > 0 else 1.0
+        self.cellSize = cellSize
+        self.origin = (bounds[:, 0].min(), bounds[:, 2].min()) if len(bounds) else (0.0, 0.0)
+        # Cell ranges [ix0, ix1] x [iy0, iy1] covered by every zone's bounding
+        # box. They use the same float operations as the points in
+        # label_points, which are monotonic, so a point inside a box can't
+        # round into a cell outside its range
+        cellsX = np.floor((bounds[:, :2] - self.origin[0])/cellSize).astype(np.intp)
+        cellsY = np.floor((bounds[:, 2:] - self.origin[1])/cellSize).astype(np.intp)
+        self.shape = (int(cellsX.max()) + 1, int(cellsY.max()) + 1) if len(bounds) else (0, 0)
+        self.cellRanges = np.column_stack((cellsX, cellsY)).tolist()
+
+    def label_points(self, points):
+        """Integer zone codes (N,) of an (N, 2) position array."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        codes = np.zeros(len(points), dtype=np.int32)
+        if not self.zones or len(points) == 0:
+            return codes
+        nx, ny = self.shape
+        ix = np.floor((points[:, 0] - self.origin[0])/self.cellSize)
+        iy = np.floor((points[:, 1] - self.origin[1])/self.cellSize)
+        # Points off the grid (and NaNs) go to a cell that no zone covers
+        offGrid = ~((ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny))
+        cellIds = np.where(offGrid, nx*ny, np.nan_to_num(ix)*ny + np.nan_to_num(iy)).astype(np.intp)
+        order = np.argsort(cellIds, kind="stable")
+        sortedIds = cellIds[order]
+
+        for k, zone in enumerate(self.zones):
+            ix0, ix1, iy0, iy1 = self.cellRanges[k]
+            # One contiguous run of sorted points per grid column of the box
+            columns = np.arange(ix0, ix1 + 1)
+            starts = np.searchsorted(sortedIds, columns*ny + iy0, side="left")
+            ends = np.searchsorted(sortedIds, columns*ny + iy1, side="right")
+            if not np.any(ends > starts):
+                continue
+            candidates = order[np.concatenate([np.arange(a, b) for a, b in zip(starts.tolist(), ends.tolist()) if b > a])]
+            candidates = candidates[codes[candidates] == 0]
+            # The cells stick out of the box, drop what is outside it before the exact test
+            cx = points[candidates, 0]
+            cy = points[candidates, 1]
+            candidates = candidates[(cx >= zone.x_min) & (cx <= zone.x_max) & (cy >= zone.y_min) & (cy <= zone.y_max)]
+            if len(candidates) == 0:
+                continue
+            inside = zone.contains_points(points[candidates])
+            codes[candidates[inside]] = k + 1
+        return codes
+
+    def label_names(self, points):
+        """Zone names of an (N, 2) position array, like find_area_for_point for every point."""
+        return np.array(self.names, dtype=object)[self.label_points(points)].tolist()
+
+def readPointsFromCSV(filename):
+    xyPoints = []
+    with open(filename, 'r') as f:
+        reader = csv.reader(f)
+        
+        # If your CSVs have headers like "x,y", uncomment the next line:
+        # next(reader, None)  # skip header row
+        next(reader, None)
+
+        for row in reader:
+            # Each row is expected to have two columns: x, y
+            if len(row) < 2:
+                continue
+            x_val, y_val = float(row[0]), float(row[1])
+            xyPoints.append((x_val,y_val))
+    return xyPoints
+def pointsFromCSVLines(lines):
+    """Parses CSV data lines (no header) into an (M, 2) float array."""
+    if not any(line.strip() for line in lines):
+        return np.empty((0, 2))
+    try:
+        return np.loadtxt(lines, delimiter=',', usecols=(0, 1), quotechar='"', ndmin=2)
+    except ValueError:
+        # Short or odd rows, parse them the same way as readPointsFromCSV
+        return np.array([(float(row[0]), float(row[1])) for row in csv.reader(lines) if len(row) >= 2],
+                        dtype=np.float64).reshape(-1, 2)
+def iterPointsFromCSV(filename, chunkSize = 1 << 16):
+    """
+    Generator version of readPointsFromCSV. Yields (M, 2) float arrays of at
+    most 'chunkSize' points, so a file of any size is read with bounded memory.
+    """
+    with open(filename, 'r', newline='') as f:
+        next(f, None)  # skip header row
+        while True:
+            lines = list(itertools.islice(f, chunkSize))
+            if not lines:
+                return
+            points = pointsFromCSVLines(lines)
+            if len(points):
+                yield points
+def transformPointChunkFromAnyLogicSimulation(chunk, imageXzero = 35, imageYzero = 36):
+    """Vectorized transformPointDataFromAnyLogicSimulation for a chunk from iterPointsFromCSV."""
+    newPoints = np.empty_like(chunk)
+    newPoints[:, 0] = chunk[:, 0] - imageXzero
+    newPoints[:, 1] = imageYzero - chunk[:, 1]
+    return newPoints
+def transformPointDataFromAnyLogicSimulation(points , imageXzero = 35 , imageYzero = 36 , inverseY = True):
+    newPoints = []
+    if points != None:
+        for i in range(0,len(points)):
+            newX = points[i][0]- imageXzero
+            newY = imageYzero - points[i][1]
+            newPoints.append((newX, newY))
+    return newPoints
+def seconds_to_hm(seconds):
+    h = seconds // 3600
+    m = (seconds % 3600) // 60
+    if h > 0:
+        return f"{h}h:{m}m"
+    elif m > 0:
+        return f"{m}m"
+    else:
+        return f"{seconds}s"
+class StateSummary:
+    """
+    Run-length summary of a state trace (one state per 'interval_seconds'),
+    computed in one vectorized pass over an integer state code array.
+
+        starts, lengths, states : the runs (first sample, samples, code)
+        dwell    : total samples per state code
+        names    : names[code], e.g. AreaLabeler.names (None if the codes are the states)
+
+    summarize_states, state_to_numeric and calculateUtilization are views
+    of it, and it gives the per-state dwell times, their histograms and the
+    state to state transition matrix as well.
+    """
+    def __init__(self, codes, names = None, interval_seconds = 1):
+        codes = np.asarray(codes).ravel()
+        self.names = list(names) if names is not None else None
+        self.interval_seconds = interval_seconds
+        self.length = len(codes)
+        if self.length:
+            first = np.empty(self.length, dtype=bool)
+            first[0] = True
+            np.not_equal(codes[1:], codes[:-1], out=first[1:])
+            self.starts = np.flatnonzero(first)
+        else:
+            self.starts = np.zeros(0, dtype=np.intp)
+        self.lengths = np.diff(np.append(self.starts, self.length))
+        self.states = codes[self.starts]
+        stateCount = len(self.names) if self.names is not None else (int(codes.max()) + 1 if self.length else 0)
+        self.dwell = np.bincount(self.states, weights=self.lengths, minlength=stateCount).astype(np.int64)
+
+    @classmethod
+    def from_states(cls, states, interval_seconds = 1):
+        """Summary of a list of state names (or any hashable states), coded in order of appearance."""
+        index = {}
+        codes = np.fromiter((index.setdefault(state, len(index)) for state in states), dtype=np.int32, count=len(states))
+        return cls(codes, list(index), interval_seconds)
+
+    def code_of(self, state):
+        if self.names is None:
+            return state
+        return self.names.index(state) if state in self.names else -1
+
+    def name_of(self, code):
+        return self.names[code] if self.names is not None else code
+
+    def summary(self):
+        """[(start time, state), ...] of every run, like summarize_states."""
+        times = (self.starts*self.interval_seconds).tolist()
+        return [(t, self.name_of(code)) for t, code in zip(times, self.states.tolist())]
+
+    def numeric(self):
+        """The summary with states as indices into their sorted set, like state_to_numeric."""
+        present = sorted({self.name_of(code) for code in np.unique(self.states).tolist()})
+        state_map = {state: i for i, state in enumerate(present)}
+        return [(t, state_map[state]) for t, state in self.summary()], state_map
+
+    def utilization(self, idleStateName = "IDLE"):
+        """Share of samples that are not in the idle state."""
+        code = self.code_of(idleStateName)
+        idle = int(self.dwell[code]) if 0 <= code < len(self.dwell) else 0
+        return 1 - idle/self.length
+
+    def counter(self):
+        """Counter of the states, like Counter(states)."""
+        return Counter({self.name_of(code): int(n) for code, n in enumerate(self.dwell.tolist()) if n})
+
+    def dwell_times(self, state):
+        """Duration in seconds of every stay in 'state'."""
+        return self.lengths[self.states == self.code_of(state)]*self.interval_seconds
+
+    def dwell_histogram(self, state, bins = 10):
+        """np.histogram of the stay durations (seconds) in 'state'."""
+        return np.histogram(self.dwell_times(state), bins=bins)
+
+    def transition_matrix(self):
+        """(S, S) counts of run to run transitions, rows are the 'from' state codes."""
+        size = len(self.dwell)
+        matrix = np.zeros((size, size), dtype=np.int64)
+        np.add.at(matrix, (self.states[:-1], self.states[1:]), 1)
+        return matrix
+
+def summarize_states(states, interval_seconds):
+    if isinstance(states, StateSummary):
+        return states.summary()
+    if len(states) == 0:
+        return []
+    return StateSummary.from_states(states, interval_seconds).summary()
+def state_to_numeric(states):
+    if isinstance(states, StateSummary):
+        return states.numeric()
+    unique_states = sorted(set(state for _, state in states))
+    state_map = {state: i for i, state in enumerate(unique_states)}
+    numeric_states = [(t, state_map[state]) for t, state in states]
+    return numeric_states, state_map
+
+def plot_step_states(states_summary):
+    numeric_states, state_map = state_to_numeric(states_summary)
+
+    times = [t for t, _ in numeric_states]
+    values = [v for _, v in numeric_states]
+
+    if len(times) > 1:
+        end_time = (times[-1] + (times[-1] - times[-2]))
+    else:
+        end_time = times[-1] + 1
+    times.append(end_time)
+    values.append(values[-1])
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.step(times, values, where='post', linewidth=2)
+
+    ax.set_yticks(list(state_map.values()))
+    ax.set_yticklabels(list(state_map.keys()))
+    ax.set_ylabel("State")
+    ax.set_xlabel("Time")
+
+    # Format x-axis labels as hours and minutes
+    def time_formatter(x, pos):
+        return seconds_to_hm(int(x))
+
+    ax.xaxis.set_major_formatter(ticker.FuncFormatter(time_formatter))
+    ax.set_title("State Transitions Over Time")
+    ax.grid(True)
+    plt.tight_layout()
+    plt.show()
+def calculateUtilization( states, idleStateName = "IDLE"):
+    if not isinstance(states, StateSummary):
+        states = StateSummary.from_states(states)
+    utilization = states.utilization(idleStateName)
+    print( "Utilization:", utilization)
+    return utilization
+def idleMask(states, idleStateName = "IDLE"):
+    """Boolean array, True where the state (a name or an integer zone code) is the idle state."""
+    if isinstance(states, np.ndarray) and states.dtype != object:
+        return states == idleStateName
+    return np.fromiter((state == idleStateName for state in states), dtype=bool, count=len(states))
+def cumulativeIdleCounts(states, idleStateName = "IDLE"):
+    """
+    Prefix sums of the idle samples: counts[i] is the number of idle states
+    in states[:i] (length len(states) + 1). Any window [a, b) then has
+    counts[b] - counts[a] idle samples, in O(1).
+    """
+    counts = np.zeros(len(states) + 1, dtype=np.int64)
+    np.cumsum(idleMask(states, idleStateName), out=counts[1:])
+    return counts
+def stateCounter(states):
+    """Counter(states), counted with numpy for arrays."""
+    if isinstance(states, np.ndarray):
+        values, counts = np.unique(states, return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+    return Counter(states)
+def rollingUtilization(states, window, idleStateName = "IDLE", idleCounts = None):
+    """
+    Sliding-window utilization at every sample: entry t is the utilization of
+    states[t - window + 1 : t + 1] (shorter at the start of the trace).
+    O(n) from the prefix sums; pass 'idleCounts' to reuse them.
+    """
+    if idleCounts is None:
+        idleCounts = cumulativeIdleCounts(states, idleStateName)
+    ends = np.arange(1, len(idleCounts))
+    starts = np.maximum(ends - window, 0)
+    return 1 - (idleCounts[ends] - idleCounts[starts])/(ends - starts)
+def utilizationGraph(states, sumPeriod = 3600, idleStateName = "IDLE", window = None, idleCounts = None):
+    """
+    Utilization every 'sumPeriod' samples. By default it is cumulative (from
+    the start of the trace up to each point); with 'window' it is the
+    utilization of the last 'window' samples before each point instead.
+    Both come from the idle prefix sums, so each point is O(1).
+    Returns (utilization values, x axis labels, Counter of the states).
+    """
+    if idleCounts is None:
+        idleCounts = cumulativeIdleCounts(states, idleStateName)
+    ends = np.arange(sumPeriod, len(states), sumPeriod)
+    starts = np.zeros_like(ends) if window is None else np.maximum(ends - window, 0)
+    avgUtil = 1 - (idleCounts[ends] - idleCounts[starts])/(ends - starts)
+    xAxisValues = [seconds_to_hm(i) for i in ends.tolist()]
+    return avgUtil.tolist(), xAxisValues, stateCounter(states)
+# Example setup:
+EXAMPLE_AREAS = [
+    ("Output Racks", (18, 16), (38, 23)),
+    ("Input Racks", (18, 2), (38, 9)),
+    ("Unloading Truck", (1, 5), (7, 13)),
+    ("Loading Truck", (1, 17), (7, 23)),
+    ("IDLE", (37, 9), (42, 16)),
+    ("Machine", (45, 5), (50, 20))
+]
+def main():
+    areas_data = EXAMPLE_AREAS
+    
+    input_file = "C:\\Users\\thano\\OneDrive - Αριστοτέλειο Πανεπιστήμιο Θεσσαλονίκης\\PhD Dissertation\\Job Shop1 with Positioning Data\\population3.csv"
+    
+    points = readPointsFromCSV(input_file)
+    points = transformPointDataFromAnyLogicSimulation(points, imageXzero=35, imageYzero=36)
+
+    # Create Area objects
+    areas = [Area(name, p1, p2) for name, p1, p2 in areas_data]
+
+    # Process points, as area codes
+    labeler = AreaLabeler(areas)
+    y = labeler.label_points(points)
+    print(f"Labeled {len(y)} points")
+    summary = StateSummary(y, labeler.names, interval_seconds=1)
+
+    calculateUtilization(summary)
+    stateTransitions = summarize_states(summary, 1)
+    utilValues, xValues, _ = utilizationGraph(y, sumPeriod = 60, idleStateName = summary.code_of("IDLE"))
+    print(summary.counter())
+    plot_step_states(stateTransitions)
+    
+    fig, ax = plt.subplots()
+    ax.plot(range(len(xValues)), utilValues, marker='o', linestyle='-', color='b')  # Plot using integer indices
+
+    # Set x-ticks at every 100th position
+    ax.set_xticks(range(0, len(xValues), 20))
+    ax.set_xticklabels(xValues[::20], rotation=45, ha='right')
+
+    ax.set_title('Forklift Utilization')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Overall Utilization')
+    ax.grid(True)
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .PointClassifier import classify_points_latest_only
-from .ClusterMerger import merge_all_within_threshold, plot_clusters_with_flow
-
+from .PointClassifier import classify_points_latest_only
+from .ClusterMerger import merge_all_within_threshold, plot_clusters_with_flow
+
 __all__ = ["classify_points_latest_only", "merge_all_within_threshold", "plot_clusters_with_flow"]
\ No newline at end of file
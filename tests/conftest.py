@@ -0,0 +1,22 @@
+import os
+import sys
+import importlib
+
+import numpy as np
+import pytest
+
+# The modules use relative imports, so the repository is imported as a
+# package under its directory name (RTLSPositioningDataClassifier in a clone)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+PACKAGE = os.path.basename(ROOT)
+
+def load(module):
+    return importlib.import_module(PACKAGE + "." + module)
+
+@pytest.fixture(scope="session")
+def sample_points():
+    """Positions of the TStransporter.txt sample log."""
+    trilateration = load("trilateration")
+    anchors = [(0.1, 0.1), (0.1, 42.8), (59.0, 0.1)]
+    return np.array(trilateration.calculateListOfPoints(os.path.join(ROOT, "TStransporter.txt"), anchors, useCache=False))
@@ -0,0 +1,121 @@
+import io
+import copy
+import math
+import contextlib
+
+import numpy as np
+import pytest
+
+from conftest import load
+
+ClusterMerger = load("ClusterMerger")
+PointClassifier = load("PointClassifier")
+
+# --- Frozen copy of the original all-pairs merge, the reference for the
+# --- grid/union-find merge_all_within_threshold. Do not optimize.
+
+def original_update_center(cluster):
+    """Recalculate the center of a cluster based on all its points"""
+    xs = [pt[0] for pt in cluster["points"]]
+    ys = [pt[1] for pt in cluster["points"]]
+    if len(xs) > 0:
+        cluster["center"] = (sum(xs)/len(xs), sum(ys)/len(ys))
+    else:
+        cluster["center"] = (0, 0)
+
+def original_merge_clusters(main_cluster_id, other_cluster_id, clusters):
+    main_cluster = clusters[main_cluster_id]
+    other_cluster = clusters[other_cluster_id]
+    main_cluster["points"].extend(other_cluster["points"])
+    original_update_center(main_cluster)
+    for cid, clus in clusters.items():
+        if cid == other_cluster_id:
+            continue
+        new_flow_to = []
+        for target in clus["flow_to"]:
+            if target == other_cluster_id:
+                new_flow_to.append(main_cluster_id)
+            else:
+                new_flow_to.append(target)
+        clus["flow_to"] = list(set(new_flow_to))
+    combined_flow = set(main_cluster["flow_to"]) | set(other_cluster["flow_to"])
+    if main_cluster_id in combined_flow:
+        combined_flow.remove(main_cluster_id)
+    main_cluster["flow_to"] = list(combined_flow)
+    del clusters[other_cluster_id]
+
+def original_merge_all_within_threshold(clusters, threshold):
+    clearPass = True
+    merged_something = True
+    while merged_something:
+        merged_something = False
+        current_ids = sorted(clusters.keys())
+        for i_index in range(len(current_ids)):
+            cid_i = current_ids[i_index]
+            if cid_i not in clusters:
+                continue
+            for j_index in range(i_index+1, len(current_ids)):
+                cid_j = current_ids[j_index]
+                if cid_j not in clusters:
+                    continue
+                dist = math.sqrt((clusters[cid_i]["center"][0] - clusters[cid_j]["center"][0])**2 +
+                                 (clusters[cid_i]["center"][1] - clusters[cid_j]["center"][1])**2)
+                if dist < threshold:
+                    clearPass = False
+                    print(f"Merging cluster {cid_j} into cluster {cid_i} (distance={dist:.2f})")
+                    original_merge_clusters(cid_i, cid_j, clusters)
+                    merged_something = True
+                    break
+            if merged_something:
+                break
+    return clusters, clearPass
+
+# ---
+
+def run_merge(merge, clusters, threshold):
+    """(clusters, clearPass, printed merge messages) of one merge run on a copy."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        merged, clearPass = merge(copy.deepcopy(clusters), threshold)
+    return merged, clearPass, output.getvalue()
+
+def assert_same_merge(clusters, threshold):
+    expected, expectedClear, expectedLog = run_merge(original_merge_all_within_threshold, clusters, threshold)
+    merged, clear, log = run_merge(ClusterMerger.merge_all_within_threshold, clusters, threshold)
+    assert log == expectedLog
+    assert clear == expectedClear
+    assert sorted(merged) == sorted(expected)
+    for cid, cluster in expected.items():
+        assert merged[cid]["points"] == cluster["points"]
+        assert set(merged[cid]["flow_to"]) == set(cluster["flow_to"])
+        assert merged[cid]["center"] == pytest.approx(cluster["center"], abs=1e-9)
+
+def random_track(seed, n=3000, step=0.5, grid=None):
+    """Random walk folded into a 50 m hall, optionally snapped to a grid for exact center ties."""
+    rng = np.random.default_rng(seed)
+    points = np.cumsum(rng.normal(0, step, (n, 2)), axis=0) % 50
+    if grid is not None:
+        points = np.round(points/grid)*grid
+    return points
+
+@pytest.mark.parametrize("segment_threshold", [0.3, 1.0, 2.0])
+@pytest.mark.parametrize("min_length", [1, 5, 20])
+@pytest.mark.parametrize("threshold", [0.5, 2, 6, 15])
+def test_merge_matches_original_on_sample_log(sample_points, segment_threshold, min_length, threshold):
+    segments = PointClassifier.segment_points_latest_only(sample_points, segment_threshold, min_length)
+    clusters = ClusterMerger.segmentsToClusterDictionary(sample_points, *segments)
+    assert_same_merge(clusters, threshold)
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("grid", [None, 0.5])
+@pytest.mark.parametrize("segment_threshold, min_length", [(0.8, 1), (1.5, 3)])
+@pytest.mark.parametrize("threshold", [0.5, 1.0, 2.5, 5, 12])
+def test_merge_matches_original_on_random_tracks(seed, grid, segment_threshold, min_length, threshold):
+    points = random_track(seed, grid=grid)
+    segments = PointClassifier.segment_points_latest_only(points, segment_threshold, min_length)
+    clusters = ClusterMerger.segmentsToClusterDictionary(points, *segments)
+    assert_same_merge(clusters, threshold)
+
+def test_merge_matches_original_on_classes():
+    classes = PointClassifier.classify_points_latest_only([tuple(p) for p in random_track(7, n=800).tolist()], 1.0)
+    assert_same_merge(ClusterMerger.classesToClusterDictionary(classes), 2.0)
@@ -1,108 +1,283 @@
-import ast
-
-# 1) Known anchor positions in 3D but we'll just use the (x,y).
-#    anchor1 = (0.1, 0.1, 0.1)
-#    anchor2 = (0.1, 42.8, 0.02)
-#    anchor3 = (59, 0.1, 0.02)
-# For 2D trilateration, we take:
-
-
-def trilateration_2d(d1, d2, d3, anchors):
-    """
-    Given distances d1, d2, d3 to anchors in 2D (x1,y1), (x2,y2), (x3,y3),
-    solve the 2D trilateration equations to find (x, y).
-
-    We'll use a standard approach by subtracting equations:
-       (x - x1)^2 + (y - y1)^2 = d1^2
-       (x - x2)^2 + (y - y2)^2 = d2^2
-       (x - x3)^2 + (y - y3)^2 = d3^2
-    """
-    (x1, y1) = anchors[0]
-    (x2, y2) = anchors[1]
-    (x3, y3) = anchors[2]
-
-    # Convert distances to squared form for convenience
-    r1_sq = d1**2
-    r2_sq = d2**2
-    r3_sq = d3**2
-
-    # We'll create two linear equations by subtracting:
-    # EqA: (Eq1 - Eq2)
-    # EqB: (Eq1 - Eq3)
-
-    # Eq1: (x - x1)^2 + (y - y1)^2 = r1_sq
-    # Eq2: (x - x2)^2 + (y - y2)^2 = r2_sq
-    # Sub(Eq1-Eq2):
-    #    x^2 - 2x x1 + x1^2 + y^2 - 2y y1 + y1^2  -  ( x^2 - 2x x2 + x2^2 + y^2 - 2y y2 + y2^2 ) = r1_sq - r2_sq
-    #
-    # This simplifies to a linear form: A1*x + B1*y + C1 = 0
-    # We'll solve similarly for EqA (from Eq1-Eq2) and EqB (from Eq1-Eq3).
-
-    A1 = 2*(x2 - x1)
-    B1 = 2*(y2 - y1)
-    C1 = (x1**2 - x2**2) + (y1**2 - y2**2) + (r2_sq - r1_sq)
-
-    A2 = 2*(x3 - x1)
-    B2 = 2*(y3 - y1)
-    C2 = (x1**2 - x3**2) + (y1**2 - y3**2) + (r3_sq - r1_sq)
-
-    # Now we have a system:
-    # A1*x + B1*y + C1 = 0
-    # A2*x + B2*y + C2 = 0
-    #
-    # We can solve using standard 2x2 linear algebra (Cramer's rule):
-    det = A1*B2 - A2*B1
-    if abs(det) < 1e-10:
-        # Degenerate case - anchors might be collinear or distances impossible
-        # Return None or some fallback
-        return None
-
-    # Solve for x, y
-    x = (B2*(-C1) - B1*(-C2)) / det
-    y = (A1*(-C2) - A2*(-C1)) / det
-
-    return (x, y)
-
-def calculateListOfPoints(filepath = "", anchors = []):
-    """
-    Reads each line from an input file named 'distances.txt'.
-    Each line is a dictionary-like string, for example:
-        {'TagName':'Tag1', 'Anchor1':10.55, 'Anchor2':37.81, 'Anchor3':51.31}
-    Then calculates the 2D position of that tag using trilateration.
-    """
-    
-    xyPoints = []
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue  # skip empty lines
-
-            # 2) Parse the dictionary-like string
-            #    e.g. "{'TagName':'Tag1', 'Anchor1':10.55, 'Anchor2':37.81, 'Anchor3':51.31}"
-            row_data = ast.literal_eval(line)  # convert string to dict
-
-            # Extract distances
-            d1 = float(row_data["Anchor1"])
-            d2 = float(row_data["Anchor2"])
-            d3 = float(row_data["Anchor3"])
-            tag_name = row_data["TagName"]
-
-            # 3) Trilateration
-            result = trilateration_2d(d1, d2, d3, anchors)
-            if result is not(None):
-                x_est, y_est = result
-                #print(f"Tag={tag_name}: Position=({x_est:.2f}, {y_est:.2f})")
-                xyPoints.append((x_est, y_est))
-
-    return xyPoints
-if __name__ == "__main__":
-    input_file = "C:\\Users\\thano\\OneDrive - Αριστοτέλειο Πανεπιστήμιο Θεσσαλονίκης\\PhD Dissertation\\PositioningDataClassifier\\TStransporter.txt"
-    anchors_2d = [
-        (0.1, 0.1),    # Anchor1
-        (0.1, 42.8),   # Anchor2
-        (59.0, 0.1)    # Anchor3
-    ]
-    points = calculateListOfPoints(filepath=input_file, anchors = anchors_2d)
-    print(points)
+import hashlib
+import numpy as np
+
+from .DistanceLogReader import DistanceLogCache, loadDistanceLog, iterDistanceLogChunks
+
+# 1) Known anchor positions in 3D but we'll just use the (x,y).
+#    anchor1 = (0.1, 0.1, 0.1)
+#    anchor2 = (0.1, 42.8, 0.02)
+#    anchor3 = (59, 0.1, 0.02)
+# For 2D trilateration, we take:
+
+
+def trilateration_2d(d1, d2, d3, anchors):
+    """
+    Given distances d1, d2, d3 to anchors in 2D (x1,y1), (x2,y2), (x3,y3),
+    solve the 2D trilateration equations to find (x, y).
+
+    We'll use a standard approach by subtracting equations:
+       (x - x1)^2 + (y - y1)^2 = d1^2
+       (x - x2)^2 + (y - y2)^2 = d2^2
+       (x - x3)^2 + (y - y3)^2 = d3^2
+    """
+    (x1, y1) = anchors[0]
+    (x2, y2) = anchors[1]
+    (x3, y3) = anchors[2]
+
+    # Convert distances to squared form for convenience
+    r1_sq = d1**2
+    r2_sq = d2**2
+    r3_sq = d3**2
+
+    # We'll create two linear equations by subtracting:
+    # EqA: (Eq1 - Eq2)
+    # EqB: (Eq1 - Eq3)
+
+    # Eq1: (x - x1)^2 + (y - y1)^2 = r1_sq
+    # Eq2: (x - x2)^2 + (y - y2)^2 = r2_sq
+    # Sub(Eq1-Eq2):
+    #    x^2 - 2x x1 + x1^2 + y^2 - 2y y1 + y1^2  -  ( x^2 - 2x x2 + x2^2 + y^2 - 2y y2 + y2^2 ) = r1_sq - r2_sq
+    #
+    # This simplifies to a linear form: A1*x + B1*y + C1 = 0
+    # We'll solve similarly for EqA (from Eq1-Eq2) and EqB (from Eq1-Eq3).
+
+    A1 = 2*(x2 - x1)
+    B1 = 2*(y2 - y1)
+    C1 = (x1**2 - x2**2) + (y1**2 - y2**2) + (r2_sq - r1_sq)
+
+    A2 = 2*(x3 - x1)
+    B2 = 2*(y3 - y1)
+    C2 = (x1**2 - x3**2) + (y1**2 - y3**2) + (r3_sq - r1_sq)
+
+    # Now we have a system:
+    # A1*x + B1*y + C1 = 0
+    # A2*x + B2*y + C2 = 0
+    #
+    # We can solve using standard 2x2 linear algebra (Cramer's rule):
+    det = A1*B2 - A2*B1
+    if abs(det) < 1e-10:
+        # Degenerate case - anchors might be collinear or distances impossible
+        # Return None or some fallback
+        return None
+
+    # Solve for x, y
+    x = (B2*(-C1) - B1*(-C2)) / det
+    y = (A1*(-C2) - A2*(-C1)) / det
+
+    return (x, y)
+
+def precompute_anchor_terms(anchors):
+    """
+    Computes the parts of the trilateration_2d system that depend only on the
+    anchor positions (A1, B1, A2, B2, det and the anchor parts of C1/C2).
+    The result can be passed to trilateration_2d_batch in place of the anchors
+    so that the same anchor set is not re-processed for every batch.
+    Returns None when the anchors are degenerate (e.g. collinear).
+    """
+    (x1, y1) = anchors[0]
+    (x2, y2) = anchors[1]
+    (x3, y3) = anchors[2]
+
+    A1 = 2*(x2 - x1)
+    B1 = 2*(y2 - y1)
+    K1 = (x1**2 - x2**2) + (y1**2 - y2**2)
+
+    A2 = 2*(x3 - x1)
+    B2 = 2*(y3 - y1)
+    K2 = (x1**2 - x3**2) + (y1**2 - y3**2)
+
+    det = A1*B2 - A2*B1
+    if abs(det) < 1e-10:
+        return None
+    return {"A1": A1, "B1": B1, "K1": K1, "A2": A2, "B2": B2, "K2": K2, "det": det}
+
+def trilateration_2d_batch(distances, anchors):
+    """
+    Vectorized version of trilateration_2d.
+    'distances' is an (N, 3) array with the distances to Anchor1..Anchor3,
+    'anchors' is either the list of 3 anchor positions or the dictionary
+    returned by precompute_anchor_terms.
+
+    Returns (positions, valid) where positions is an (N, 2) array and valid is
+    a boolean mask of the rows that produced a finite fix. Invalid rows are NaN.
+    """
+    distances = np.asarray(distances, dtype=np.float64).reshape(-1, 3)
+    terms = anchors if isinstance(anchors, dict) else precompute_anchor_terms(anchors)
+
+    positions = np.full((len(distances), 2), np.nan)
+    if terms is None:
+        # Degenerate anchor layout - no row can be solved
+        return positions, np.zeros(len(distances), dtype=bool)
+
+    r_sq = distances**2
+    C1 = terms["K1"] + (r_sq[:, 1] - r_sq[:, 0])
+    C2 = terms["K2"] + (r_sq[:, 2] - r_sq[:, 0])
+
+    positions[:, 0] = (terms["B2"]*(-C1) - terms["B1"]*(-C2)) / terms["det"]
+    positions[:, 1] = (terms["A1"]*(-C2) - terms["A2"]*(-C1)) / terms["det"]
+    valid = np.isfinite(positions).all(axis=1)
+    return positions, valid
+
+class LeastSquaresTrilateration:
+    """
+    Least-squares trilateration for any number of anchors, built once per
+    anchor layout.
+
+    Every anchor i gives one linear equation in the unknowns (x, y, x^2+y^2):
+        -2*xi*x - 2*yi*y + (x^2 + y^2) = di^2 - (xi^2 + yi^2)
+    The pseudo-inverse of this system is precomputed for every combination
+    of anchors that shows up in the data, so a batch is solved with one
+    matrix product per combination, whatever the number of anchors.
+    With exactly three anchors the result is the same fix as trilateration_2d.
+    """
+    def __init__(self, anchors):
+        self.anchors = np.asarray(anchors, dtype=np.float64).reshape(-1, 2)
+        self.anchorNorms = (self.anchors**2).sum(axis=1)
+        self._solvers = {}
+
+    def _solverFor(self, presentMask):
+        """Pseudo-inverse for the anchors in 'presentMask' (bit i = Anchor i+1), None if degenerate."""
+        if presentMask not in self._solvers:
+            idx = [i for i in range(len(self.anchors)) if presentMask >> i & 1]
+            solver = None
+            if len(idx) >= 3:
+                A = np.column_stack((-2*self.anchors[idx], np.ones(len(idx))))
+                if np.linalg.matrix_rank(A, tol=1e-10) == 3:
+                    solver = (np.array(idx), np.linalg.pinv(A))
+            self._solvers[presentMask] = solver
+        return self._solvers[presentMask]
+
+    def solve(self, distances, maxResidual=None):
+        """
+        'distances' is an (N, K) array with the distances to the K anchors of
+        the layout, NaN where an anchor wasn't heard. Each row is solved with
+        the anchors present in it.
+
+        Returns (positions, residuals, valid):
+            positions : (N, 2) array, NaN where no fix was possible
+            residuals : (N,) RMS of the range errors of the fix in meters
+            valid     : rows with a fix (and residual <= maxResidual if given)
+        """
+        distances = np.asarray(distances, dtype=np.float64).reshape(-1, len(self.anchors))
+        positions = np.full((len(distances), 2), np.nan)
+
+        present = np.isfinite(distances)
+        masks = present @ (1 << np.arange(len(self.anchors)))
+        uniqueMasks, inverse = np.unique(masks, return_inverse=True)
+        # Group the rows by anchor combination with a single sort
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=len(uniqueMasks)))))
+        for g, presentMask in enumerate(uniqueMasks.tolist()):
+            solver = self._solverFor(presentMask)
+            if solver is None:
+                continue
+            idx, pinv = solver
+            rows = order[bounds[g]:bounds[g + 1]] if len(uniqueMasks) > 1 else slice(None)
+            b = distances[rows][:, idx]**2 - self.anchorNorms[idx]
+            positions[rows] = (b @ pinv.T)[:, :2]
+
+        # RMS of the difference between the fitted and the measured ranges
+        fitted = np.hypot(positions[:, None, 0] - self.anchors[:, 0], positions[:, None, 1] - self.anchors[:, 1])
+        errors = np.where(present, fitted - distances, 0.0)
+        counts = present.sum(axis=1)
+        residuals = np.sqrt((errors**2).sum(axis=1) / np.maximum(counts, 1))
+
+        valid = np.isfinite(positions).all(axis=1)
+        if maxResidual is not None:
+            valid &= residuals <= maxResidual
+        return positions, residuals, valid
+
+def calculatePositions(filepath, anchors, useCache=True, log=None):
+    """
+    Parses the distance log 'filepath' and trilaterates every line.
+    Layouts with more than three anchors use LeastSquaresTrilateration.
+    Returns (positions, valid) arrays as in trilateration_2d_batch.
+    With useCache the parsed columns and the positions for this anchor set
+    are kept in the sidecar DistanceLogCache of the file, so opening the
+    same capture again only memory-maps the stored arrays.
+    An already loaded DistanceLog of the file can be passed as 'log'.
+    """
+    cache = DistanceLogCache(filepath) if useCache else None
+    anchorKey = "positions_" + hashlib.blake2b(
+        np.asarray(anchors, dtype=np.float64).tobytes(), digest_size=8).hexdigest()
+
+    if cache is not None and cache.isValid():
+        positions = cache.loadArray(anchorKey)
+        valid = cache.loadArray(anchorKey + "_valid")
+        if positions is not None and valid is not None:
+            return positions, valid
+
+    if log is None:
+        log = loadDistanceLog(filepath, anchorCount=len(anchors), useCache=useCache)
+    if len(anchors) == 3:
+        positions, valid = trilateration_2d_batch(log.distances, anchors)
+    else:
+        positions, _, valid = LeastSquaresTrilateration(anchors).solve(log.distances)
+    if cache is not None and cache.isValid():
+        try:
+            cache.storeArray(anchorKey, positions)
+            cache.storeArray(anchorKey + "_valid", valid)
+        except OSError as e:
+            print("Could not write the positions cache:", e)
+    return positions, valid
+
+def splitPositionsByTag(tagIds, positions, valid, tagNames):
+    """
+    Partitions the rows of a log by tag in one pass.
+    Returns {tagName: (M, 2) array} with the valid positions of every tag,
+    each one contiguous and in the original (time) order.
+    """
+    tagIds = np.asarray(tagIds)[valid]
+    positions = np.asarray(positions)[valid]
+    order = np.argsort(tagIds, kind="stable")
+    counts = np.bincount(tagIds, minlength=len(tagNames))
+    perTag = np.split(positions[order], np.cumsum(counts)[:-1])
+    return {tagName: perTag[i] for i, tagName in enumerate(tagNames) if counts[i] > 0}
+
+def calculatePositionsPerTag(filepath, anchors, useCache=True):
+    """
+    Reads a log with many tags once and returns {tagName: (M, 2) positions},
+    so every tag's track can be classified on its own.
+    """
+    log = loadDistanceLog(filepath, anchorCount=len(anchors), useCache=useCache)
+    positions, valid = calculatePositions(filepath, anchors, useCache, log=log)
+    return splitPositionsByTag(log.tagIds, positions, valid, log.tagNames)
+
+def iterPositionChunks(filepath, anchors, chunkSize=1 << 16):
+    """
+    Generator version of calculatePositions for captures that don't fit in
+    memory. Reads 'chunkSize' lines at a time and yields the (M, 2) array of
+    their valid positions (M <= chunkSize).
+    """
+    terms = precompute_anchor_terms(anchors) if len(anchors) == 3 else None
+    solver = LeastSquaresTrilateration(anchors) if len(anchors) != 3 else None
+    for chunk in iterDistanceLogChunks(filepath, anchorCount=len(anchors), chunkSize=chunkSize):
+        if solver is None:
+            positions, valid = trilateration_2d_batch(chunk.distances, terms)
+        else:
+            positions, _, valid = solver.solve(chunk.distances)
+        yield positions[valid]
+
+def calculateListOfPoints(filepath = "", anchors = [], useCache = True):
+    """
+    Reads each line from an input file named 'distances.txt'.
+    Each line is a dictionary-like string, for example:
+        {'TagName':'Tag1', 'Anchor1':10.55, 'Anchor2':37.81, 'Anchor3':51.31}
+    Then calculates the 2D position of that tag using trilateration.
+    All tags end up in one list, use calculatePositionsPerTag for logs with
+    more than one tag and calculatePositions to get arrays instead of a list.
+    """
+    positions, valid = calculatePositions(filepath, anchors, useCache)
+    xyPoints = [tuple(p) for p in positions[valid].tolist()]
+
+    return xyPoints
+if __name__ == "__main__":
+    input_file = "C:\\Users\\thano\\OneDrive - Αριστοτέλειο Πανεπιστήμιο Θεσσαλονίκης\\PhD Dissertation\\PositioningDataClassifier\\TStransporter.txt"
+    anchors_2d = [
+        (0.1, 0.1),    # Anchor1
+        (0.1, 42.8),   # Anchor2
+        (59.0, 0.1)    # Anchor3
+    ]
+    points = calculateListOfPoints(filepath=input_file, anchors = anchors_2d)
+    print(points)
     print(len(points))
\ No newline at end of file